@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 try:
     from .webscraper_workflow import (
         LoadImageFromLibrary,
+        LoadImagesFromLibrary,
         SearchImageLibrary,
         WebScraperExtension,
         comfy_entrypoint,
@@ -20,9 +21,9 @@ try:
     )
     logger.info("Web scraper nodes loaded successfully")
 except Exception as e:
-    logger.error(f"Failed to import webscraper_workflow: {e}")
-    import traceback
-    logger.error(traceback.format_exc())
+    # exc_info lets the logging handler format the traceback only if the
+    # record is actually emitted
+    logger.error("Failed to import webscraper_workflow: %s", e, exc_info=True)
     # Define a dummy entrypoint to prevent loading errors
     async def comfy_entrypoint():
         from comfy_api.latest import ComfyExtension
@@ -36,6 +37,7 @@ WEB_DIRECTORY = "./web"
 
 __all__ = [
     "LoadImageFromLibrary",
+    "LoadImagesFromLibrary",
     "SearchImageLibrary",
     "WebScraperExtension",
     "comfy_entrypoint",
@@ -5,20 +5,182 @@ This can be used by your web scraper to add images to the library
 
 import os
 import json
+import stat
 import sqlite3
-import platform
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from PIL import Image
 
+# Optional: incremental JSON parsing for large scraper dumps
 try:
-    from .webscraper_workflow import ImageLibraryManager, DEFAULT_LIBRARY_PATH
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from .webscraper_workflow import ImageLibraryManager, DEFAULT_LIBRARY_PATH, HOSTNAME
 except ImportError:
     # Allow running as standalone script
     import sys
     from pathlib import Path
     sys.path.insert(0, str(Path(__file__).parent))
-    from webscraper_workflow import ImageLibraryManager, DEFAULT_LIBRARY_PATH
+    from webscraper_workflow import ImageLibraryManager, DEFAULT_LIBRARY_PATH, HOSTNAME
+
+
+# Insert a new image row, or refresh the metadata of an existing one.
+# Relies on the UNIQUE constraint on images.filepath.
+_UPSERT_IMAGE_SQL = '''
+    INSERT INTO images 
+    (filename, filepath, category, tags, source, resolution_width, resolution_height, file_size)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(filepath) DO UPDATE SET
+        category = excluded.category,
+        tags = excluded.tags,
+        source = excluded.source,
+        resolution_width = excluded.resolution_width,
+        resolution_height = excluded.resolution_height,
+        file_size = excluded.file_size,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+_INSERT_MACHINE_NAME_SQL = '''
+    INSERT OR IGNORE INTO machine_names (image_id, machine_name)
+    VALUES (?, ?)
+'''
+
+# Stay well below SQLite's bound-parameter limit for "IN (...)" lookups
+_MAX_SQL_VARIABLES = 500
+
+# Records read and written per step of a batch import
+_IMPORT_CHUNK_SIZE = 1000
+
+# Threads used to read file metadata during a batch import (I/O bound)
+_METADATA_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+class _LibrarySession:
+    """
+    One tuned connection and one transaction for a group of library writes
+    
+    Commits when the block exits cleanly and rolls back if it raises:
+    
+        with _LibrarySession(library_path) as session:
+            _upsert_images(session.cursor, rows, machine_names)
+    
+    Long writers can call commit() / rollback() to end the current
+    transaction early; a new one is started on the same connection.
+    """
+    
+    def __init__(self, library_path: str = DEFAULT_LIBRARY_PATH):
+        self.library_path = library_path
+        self.manager: Optional[ImageLibraryManager] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self.cursor: Optional[sqlite3.Cursor] = None
+    
+    def __enter__(self) -> "_LibrarySession":
+        self.manager = ImageLibraryManager(self.library_path)
+        self.conn = self.manager.connect()
+        self.conn.execute("BEGIN")
+        self.cursor = self.conn.cursor()
+        return self
+    
+    def commit(self) -> None:
+        """Commit the writes so far and start a new transaction"""
+        self.conn.commit()
+        self.manager.invalidate_cache()
+        self.conn.execute("BEGIN")
+    
+    def rollback(self) -> None:
+        """Discard the writes since the last commit and start a new transaction"""
+        self.conn.rollback()
+        self.conn.execute("BEGIN")
+    
+    def __exit__(self, exc_type, exc_value, tb) -> bool:
+        try:
+            if exc_type is None:
+                self.conn.commit()
+                # New rows may carry new categories / machine names
+                self.manager.invalidate_cache()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+            self.manager = None
+            self.conn = None
+            self.cursor = None
+        return False
+
+
+def build_image_row(
+    image_path: str,
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    source: Optional[str] = None
+) -> Optional[Tuple]:
+    """
+    Read the metadata of an image file and return it as an images row tuple
+    (filename, filepath, category, tags, source, width, height, file_size).
+    Returns None if the file is missing or cannot be read.
+    """
+    # One stat call answers both "does it exist" and "how big is it"
+    try:
+        file_stat = os.stat(image_path) if image_path else None
+    except OSError:
+        file_stat = None
+    if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+        print(f"Error: Image file not found: {image_path}")
+        return None
+    
+    try:
+        # Image.open only parses the header; pixel data is never decoded
+        with Image.open(image_path) as img:
+            width, height = img.size
+        file_size = file_stat.st_size
+        filename = os.path.basename(image_path)
+    except Exception as e:
+        print(f"Error reading image metadata for {image_path}: {e}")
+        return None
+    
+    # Convert tags list to string
+    tags_str = ",".join(tags) if tags else None
+    
+    return (filename, image_path, category, tags_str, source, width, height, file_size)
+
+
+def _upsert_images(
+    cursor: sqlite3.Cursor,
+    rows: List[Tuple],
+    machine_names: List[Optional[str]]
+) -> None:
+    """
+    Write prepared image rows and their machine name associations.
+    The caller owns the connection and is responsible for committing.
+    """
+    if not rows:
+        return
+    
+    cursor.executemany(_UPSERT_IMAGE_SQL, rows)
+    
+    # Resolve the ids of the rows we just wrote (new or existing)
+    filepaths = [row[1] for row in rows]
+    image_ids = {}
+    for start in range(0, len(filepaths), _MAX_SQL_VARIABLES):
+        chunk = filepaths[start:start + _MAX_SQL_VARIABLES]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(
+            f"SELECT id, filepath FROM images WHERE filepath IN ({placeholders})",
+            chunk
+        )
+        image_ids.update((filepath, image_id) for image_id, filepath in cursor.fetchall())
+    
+    # Add machine name associations
+    cursor.executemany(_INSERT_MACHINE_NAME_SQL, [
+        (image_ids[row[1]], name)
+        for row, name in zip(rows, machine_names)
+        if name and row[1] in image_ids
+    ])
 
 
 def add_image_to_library(
@@ -43,64 +205,20 @@ def add_image_to_library(
     Returns:
         True if successful, False otherwise
     """
-    if not os.path.exists(image_path):
-        print(f"Error: Image file not found: {image_path}")
+    row = build_image_row(image_path, category, tags, source)
+    if row is None:
         return False
     
     try:
-        manager = ImageLibraryManager(library_path)
-        
-        # Get image metadata
-        img = Image.open(image_path)
-        width, height = img.size
-        file_size = os.path.getsize(image_path)
-        filename = os.path.basename(image_path)
-        
-        # Convert tags list to string
-        tags_str = ",".join(tags) if tags else None
-        
         # Get machine name if not provided
         if not machine_name:
-            machine_name = platform.node()
+            machine_name = HOSTNAME
         
         # Add to database
-        conn = sqlite3.connect(str(manager.db_path))
-        cursor = conn.cursor()
-        
-        # Check if image already exists
-        cursor.execute("SELECT id FROM images WHERE filepath = ?", (image_path,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing entry
-            image_id = existing[0]
-            cursor.execute('''
-                UPDATE images 
-                SET category = ?, tags = ?, source = ?, 
-                    resolution_width = ?, resolution_height = ?, 
-                    file_size = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (category, tags_str, source, width, height, file_size, image_id))
-        else:
-            # Insert new entry
-            cursor.execute('''
-                INSERT INTO images 
-                (filename, filepath, category, tags, source, resolution_width, resolution_height, file_size)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (filename, image_path, category, tags_str, source, width, height, file_size))
-            image_id = cursor.lastrowid
-        
-        # Add machine name association
-        if machine_name:
-            cursor.execute('''
-                INSERT OR IGNORE INTO machine_names (image_id, machine_name)
-                VALUES (?, ?)
-            ''', (image_id, machine_name))
+        with _LibrarySession(library_path) as session:
+            _upsert_images(session.cursor, [row], [machine_name])
         
-        conn.commit()
-        conn.close()
-        
-        print(f"Successfully added image to library: {filename}")
+        print(f"Successfully added image to library: {row[0]}")
         return True
         
     except Exception as e:
@@ -108,15 +226,87 @@ def add_image_to_library(
         return False
 
 
-def batch_add_images(
+def add_image_rows(
+    rows: List[Tuple],
+    machine_name: Optional[str] = None,
+    library_path: str = DEFAULT_LIBRARY_PATH
+) -> None:
+    """
+    Write rows prepared by build_image_row in a single transaction
+    
+    For callers that read image metadata as files arrive and commit in
+    groups, so the database pays one commit per group instead of per image.
+    Raises on database errors; nothing from the group is kept in that case.
+    
+    Args:
+        rows: Image row tuples from build_image_row
+        machine_name: Machine name for every row (defaults to this machine)
+        library_path: Path to the library directory
+    """
+    machine_name = machine_name or HOSTNAME
+    with _LibrarySession(library_path) as session:
+        _upsert_images(session.cursor, rows, [machine_name] * len(rows))
+
+
+def _read_image_record(data: Dict[str, Any]) -> Optional[Tuple[Tuple, Optional[str]]]:
+    """Build the images row for one import record, paired with its machine name."""
+    row = build_image_row(
+        data.get("image_path"),
+        category=data.get("category"),
+        tags=data.get("tags"),
+        source=data.get("source")
+    )
+    if row is None:
+        return None
+    return row, data.get("machine_name")
+
+
+def _add_image_chunk(
+    cursor: sqlite3.Cursor,
     image_data: List[Dict[str, Any]],
+    results: Dict[str, int],
+    executor: ThreadPoolExecutor
+) -> None:
+    """
+    Read metadata for one chunk of records and write them through an open
+    cursor, updating the success/failed counts in results.
+    """
+    # Stat + header reads are independent per file, so overlap them on the
+    # pool; the database only sees ready rows
+    rows = []
+    machine_names = []
+    for record in executor.map(_read_image_record, image_data):
+        if record is None:
+            results["failed"] += 1
+            continue
+        row, machine_name = record
+        rows.append(row)
+        machine_names.append(machine_name or HOSTNAME)
+    
+    _upsert_images(cursor, rows, machine_names)
+    results["success"] += len(rows)
+
+
+def batch_add_images(
+    image_data: Iterable[Dict[str, Any]],
     library_path: str = DEFAULT_LIBRARY_PATH
-) -> Dict[str, int]:
+) -> Dict[str, Any]:
     """
     Batch add multiple images to the library
     
+    Records are consumed in chunks of _IMPORT_CHUNK_SIZE, so image_data can
+    be a generator and is never fully materialized. Each chunk is written
+    with one prepared UPSERT statement and committed on its own, so a large
+    import pays one commit per chunk instead of one per image.
+    
+    A chunk that cannot be written is rolled back and all of its records
+    are counted as failed; the chunks before and after it are kept. If
+    image_data itself fails part-way (e.g. a JSON parse error), the import
+    stops there, keeps what was already committed and reports the problem
+    under "error".
+    
     Args:
-        image_data: List of dictionaries, each containing:
+        image_data: Iterable of dictionaries, each containing:
             - image_path: Path to image file (required)
             - category: Optional category
             - tags: Optional list of tags
@@ -125,22 +315,33 @@ def batch_add_images(
         library_path: Path to the library directory
     
     Returns:
-        Dictionary with counts: {"success": X, "failed": Y}
-    """
-    results = {"success": 0, "failed": 0}
-    
-    for data in image_data:
-        if add_image_to_library(
-            image_path=data.get("image_path"),
-            category=data.get("category"),
-            tags=data.get("tags"),
-            source=data.get("source"),
-            machine_name=data.get("machine_name"),
-            library_path=library_path
-        ):
-            results["success"] += 1
-        else:
-            results["failed"] += 1
+        Dictionary with counts: {"success": X, "failed": Y}, plus an
+        "error" message if reading image_data failed part-way
+    """
+    results: Dict[str, Any] = {"success": 0, "failed": 0}
+    
+    with _LibrarySession(library_path) as session, \
+            ThreadPoolExecutor(max_workers=_METADATA_WORKERS) as executor:
+        records = iter(image_data)
+        while True:
+            try:
+                chunk = list(islice(records, _IMPORT_CHUNK_SIZE))
+            except Exception as e:
+                print(f"Error reading import records after {results['success'] + results['failed']}: {e}")
+                results["error"] = str(e)
+                break
+            if not chunk:
+                break
+            
+            success, failed = results["success"], results["failed"]
+            try:
+                _add_image_chunk(session.cursor, chunk, results, executor)
+                session.commit()
+            except Exception as e:
+                print(f"Error adding {len(chunk)} images to library: {e}")
+                session.rollback()
+                results["success"] = success
+                results["failed"] = failed + len(chunk)
     
     return results
 
@@ -148,10 +349,17 @@ def batch_add_images(
 def import_from_scraper_json(
     json_path: str,
     library_path: str = DEFAULT_LIBRARY_PATH
-) -> Dict[str, int]:
+) -> Dict[str, Any]:
     """
     Import images from a JSON file created by a web scraper
     
+    When ijson is installed the file is parsed incrementally, so memory use
+    stays flat regardless of file size; otherwise it is loaded in one go.
+    
+    Returns the counts from batch_add_images. If the file cannot be read,
+    the result also carries an "error" message; with ijson a parse error
+    part-way through keeps the records imported before it.
+    
     Expected JSON format:
     [
         {
@@ -169,6 +377,10 @@ def import_from_scraper_json(
         return {"success": 0, "failed": 0}
     
     try:
+        if ijson is not None:
+            with open(json_path, 'rb') as f:
+                return batch_add_images(ijson.items(f, 'item'), library_path)
+        
         with open(json_path, 'r', encoding='utf-8') as f:
             image_data = json.load(f)
         
@@ -176,7 +388,7 @@ def import_from_scraper_json(
         
     except Exception as e:
         print(f"Error importing from JSON: {e}")
-        return {"success": 0, "failed": 0}
+        return {"success": 0, "failed": 0, "error": str(e)}
 
 
 if __name__ == "__main__":
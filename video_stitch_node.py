@@ -5,9 +5,12 @@ Seamlessly stitches multiple video clips using interpolation and crossfade.
 
 from __future__ import annotations
 
+import functools
+import math
+import os
+
 import torch
-import numpy as np
-from PIL import Image
+import torch.nn.functional as F
 import logging
 
 from comfy_api.latest import io
@@ -15,8 +18,160 @@ from comfy_api.latest import io
 logger = logging.getLogger(__name__)
 
 
+# Easing functions over t in [0, 1], applied to the whole step vector at once
+_ALPHA_CURVES = {
+    "linear": lambda t: t,
+    # Smooth ease in/out curve
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+    # Cosine interpolation (smoother)
+    "cosine": lambda t: (1 - torch.cos(t * math.pi)) / 2,
+    # Sigmoid curve (sharper transition in middle)
+    "sigmoid": lambda t: torch.sigmoid(12 * (t - 0.5)),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _alpha_curve_cpu(num_frames: int, method: str, include_endpoints: bool) -> torch.Tensor:
+    """Memoized fp32 CPU blend weights; shared between calls, so never modify in place."""
+    if include_endpoints:
+        t = torch.linspace(0, 1, num_frames, dtype=torch.float64)
+    else:
+        t = torch.arange(1, num_frames + 1, dtype=torch.float64) / (num_frames + 1)
+    
+    alpha = _ALPHA_CURVES[method](t)
+    return alpha.to(torch.float32).view(-1, 1, 1, 1)
+
+
+def _alpha_curve(num_frames: int, method: str,
+                 device: torch.device, dtype: torch.dtype,
+                 include_endpoints: bool = False) -> torch.Tensor:
+    """
+    Blend weights for num_frames steps between two frames.
+    
+    By default the steps lie strictly between the frames (t never hits 0
+    or 1); include_endpoints spreads them over [0, 1] instead.
+    Returns a [num_frames, 1, 1, 1] tensor so it broadcasts over
+    [N, H, W, C] frame batches. The curve itself is computed once per
+    (num_frames, method) and only copied to the target device/dtype.
+    """
+    # Unknown methods fall back to linear; normalizing first keeps them from
+    # taking up their own cache entries
+    if method not in _ALPHA_CURVES:
+        method = "linear"
+    curve = _alpha_curve_cpu(num_frames, method, include_endpoints)
+    return curve.to(device=device, dtype=dtype, non_blocking=True)
+
+
+def _blend_dtype(frames: torch.Tensor) -> torch.dtype:
+    """
+    Dtype to do elementwise blending in.
+    
+    fp32 RGB/RGBA frames on the GPU are blended in fp16, which halves memory
+    traffic and still resolves well below one 8-bit step (bf16 does not).
+    On the CPU half precision is usually slower, so frames are left as-is.
+    """
+    if frames.is_cuda and frames.dtype == torch.float32 and frames.shape[-1] in (3, 4):
+        return torch.float16
+    return frames.dtype
+
+
+# Opt-in torch.compile for the elementwise blend kernels. Inductor fuses the
+# dtype casts, lerp and clamp into single kernels, but needs a working backend
+# (triton on CUDA) and pays a compile on first use, so it is off by default.
+_COMPILE_BLENDS = os.environ.get("VIDEO_STITCH_COMPILE", "").lower() in ("1", "true", "yes")
+
+
+def _maybe_compile(fn):
+    """
+    Wrap fn with torch.compile when VIDEO_STITCH_COMPILE is set.
+    
+    String/dtype arguments are compile-time constants, so each blend method
+    gets its own specialized graph (compiled once); frame counts and sizes
+    are dynamic. If compilation fails the eager function is used from then on.
+    """
+    if not _COMPILE_BLENDS or not hasattr(torch, "compile"):
+        return fn
+    
+    compiled = torch.compile(fn, dynamic=True, fullgraph=True)
+    use_compiled = True
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        nonlocal use_compiled
+        if use_compiled:
+            try:
+                return compiled(*args, **kwargs)
+            except Exception as e:
+                use_compiled = False
+                logger.warning(f"torch.compile failed for {fn.__name__}, using eager mode: {e}")
+        return fn(*args, **kwargs)
+    
+    return wrapper
+
+
+@_maybe_compile
+def _lerp_kernel(start: torch.Tensor, end: torch.Tensor, weight: torch.Tensor,
+                 dtype: torch.dtype) -> torch.Tensor:
+    """Pure-tensor lerp in dtype, returned in start's dtype."""
+    return torch.lerp(start.to(dtype), end.to(dtype), weight.to(dtype)).to(start.dtype)
+
+
+@_maybe_compile
+def _blend_kernel(a: torch.Tensor, b: torch.Tensor, factor: torch.Tensor,
+                  mode: str, dtype: torch.dtype) -> torch.Tensor:
+    """
+    Pure-tensor blend of two frame batches for VideoFrameBlender.
+    
+    factor is a 0-d tensor rather than a float so a compiled graph is not
+    specialized (and recompiled) per blend factor value.
+    """
+    out_dtype = a.dtype
+    a = a.to(dtype)
+    b = b.to(dtype)
+    factor = factor.to(dtype)
+    
+    if mode == "add":
+        result = torch.clamp(a + b * factor, 0, 1)
+    elif mode == "multiply":
+        result = torch.clamp(a * (b * factor + (1 - factor)), 0, 1)
+    elif mode == "screen":
+        result = torch.clamp(1 - (1 - a) * (1 - b * factor), 0, 1)
+    elif mode == "overlay":
+        # Select between the two branches arithmetically instead of
+        # materializing a bool mask for torch.where, and share b * factor
+        scaled_b = b * factor
+        dark = 2 * a * scaled_b
+        light = 1 - 2 * (1 - a) * (1 - scaled_b)
+        result = torch.clamp(torch.lerp(light, dark, (a < 0.5).to(dtype)), 0, 1)
+    else:
+        # "mix": a convex combination of two 0-1 images is already in range
+        result = torch.lerp(a, b, factor)
+    
+    return result.to(out_dtype)
+
+
+def _lerp_frames(start: torch.Tensor, end: torch.Tensor, weight: torch.Tensor,
+                 out: torch.Tensor | None = None) -> torch.Tensor:
+    """
+    torch.lerp computed in _blend_dtype and returned in start's dtype.
+    
+    If out is given the result is written into it (e.g. a slice of a
+    preallocated output) instead of a new tensor.
+    """
+    dtype = _blend_dtype(start)
+    if _COMPILE_BLENDS:
+        blended = _lerp_kernel(start, end, weight, dtype)
+        return blended if out is None else out.copy_(blended)
+    if dtype == start.dtype:
+        return torch.lerp(start, end, weight, out=out)
+    blended = torch.lerp(start.to(dtype), end.to(dtype), weight.to(dtype))
+    if out is None:
+        return blended.to(start.dtype)
+    return out.copy_(blended)
+
+
 def interpolate_frames(frame_a: torch.Tensor, frame_b: torch.Tensor, 
-                      num_frames: int, method: str = "linear") -> list:
+                      num_frames: int, method: str = "linear") -> torch.Tensor:
     """
     Generate interpolated frames between two frames.
     
@@ -27,36 +182,15 @@ def interpolate_frames(frame_a: torch.Tensor, frame_b: torch.Tensor,
         method: Interpolation method (linear, ease_in_out, cosine, sigmoid)
     
     Returns:
-        List of interpolated frame tensors
+        Tensor of interpolated frames [num_frames, H, W, C]
     """
     if num_frames <= 0:
-        return []
+        return frame_a.new_empty((0, *frame_a.shape))
     
-    interpolated = []
+    alpha = _alpha_curve(num_frames, method, frame_a.device, frame_a.dtype)
     
-    for i in range(1, num_frames + 1):
-        # Calculate blend factor based on method
-        t = i / (num_frames + 1)  # Progress from 0 to 1
-        
-        if method == "linear":
-            alpha = t
-        elif method == "ease_in_out":
-            # Smooth ease in/out curve
-            alpha = t * t * (3 - 2 * t)
-        elif method == "cosine":
-            # Cosine interpolation (smoother)
-            alpha = (1 - np.cos(t * np.pi)) / 2
-        elif method == "sigmoid":
-            # Sigmoid curve (sharper transition in middle)
-            alpha = 1 / (1 + np.exp(-12 * (t - 0.5)))
-        else:
-            alpha = t
-        
-        # Blend frames
-        blended = frame_a * (1 - alpha) + frame_b * alpha
-        interpolated.append(blended)
-    
-    return interpolated
+    # Single broadcasted blend over all frames
+    return _lerp_frames(frame_a.unsqueeze(0), frame_b.unsqueeze(0), alpha)
 
 
 def crossfade_sequences(seq_a: torch.Tensor, seq_b: torch.Tensor,
@@ -74,46 +208,18 @@ def crossfade_sequences(seq_a: torch.Tensor, seq_b: torch.Tensor,
         # No crossfade, just concatenate
         return torch.cat([seq_a, seq_b], dim=0)
     
-    # Split sequences
-    pre_fade_a = seq_a[:-crossfade_frames] if crossfade_frames < len_a else torch.empty(0, *seq_a.shape[1:])
-    fade_a = seq_a[-crossfade_frames:]
-    fade_b = seq_b[:crossfade_frames]
-    post_fade_b = seq_b[crossfade_frames:] if crossfade_frames < len_b else torch.empty(0, *seq_b.shape[1:])
+    # Output is A before the fade + blended frames + B after the fade,
+    # written straight into one preallocated tensor
+    pre_fade = len_a - crossfade_frames
+    result = seq_a.new_empty((pre_fade + len_b, *seq_a.shape[1:]))
+    result[:pre_fade].copy_(seq_a[:pre_fade])
+    result[len_a:].copy_(seq_b[crossfade_frames:])
     
-    # Generate crossfade frames
-    crossfade_result = []
-    for i in range(crossfade_frames):
-        t = (i + 1) / (crossfade_frames + 1)
-        
-        if method == "linear":
-            alpha = t
-        elif method == "ease_in_out":
-            alpha = t * t * (3 - 2 * t)
-        elif method == "cosine":
-            alpha = (1 - np.cos(t * np.pi)) / 2
-        elif method == "sigmoid":
-            alpha = 1 / (1 + np.exp(-12 * (t - 0.5)))
-        else:
-            alpha = t
-        
-        blended = fade_a[i] * (1 - alpha) + fade_b[i] * alpha
-        crossfade_result.append(blended)
-    
-    crossfade_tensor = torch.stack(crossfade_result, dim=0) if crossfade_result else torch.empty(0, *seq_a.shape[1:])
-    
-    # Combine all parts
-    parts = []
-    if pre_fade_a.shape[0] > 0:
-        parts.append(pre_fade_a)
-    if crossfade_tensor.shape[0] > 0:
-        parts.append(crossfade_tensor)
-    if post_fade_b.shape[0] > 0:
-        parts.append(post_fade_b)
-    
-    if parts:
-        return torch.cat(parts, dim=0)
-    else:
-        return torch.cat([seq_a, seq_b], dim=0)
+    # Blend the overlapping frames in one broadcasted op
+    alpha = _alpha_curve(crossfade_frames, method, seq_a.device, seq_a.dtype)
+    _lerp_frames(seq_a[pre_fade:], seq_b[:crossfade_frames], alpha, out=result[pre_fade:len_a])
+    
+    return result
 
 
 def resize_video_to_match(video_a: torch.Tensor, video_b: torch.Tensor) -> torch.Tensor:
@@ -125,14 +231,80 @@ def resize_video_to_match(video_a: torch.Tensor, video_b: torch.Tensor) -> torch
     logger.warning("Resizing video_b to match video_a dimensions")
     
     h, w = video_a.shape[1], video_a.shape[2]
-    resized_frames = []
-    for frame in video_b:
-        frame_np = (frame.cpu().numpy() * 255).astype(np.uint8)
-        img = Image.fromarray(frame_np)
-        img_resized = img.resize((w, h), Image.Resampling.LANCZOS)
-        frame_resized = torch.from_numpy(np.array(img_resized).astype(np.float32) / 255.0)
-        resized_frames.append(frame_resized)
-    return torch.stack(resized_frames, dim=0).to(video_a.device)
+    
+    # Resize the whole batch in one kernel: [N, H, W, C] -> [N, C, H, W] and back.
+    # Bicubic with antialiasing is a close match for PIL's LANCZOS, including downscales.
+    frames = video_b.to(video_a.device).permute(0, 3, 1, 2)
+    
+    # The antialiased CPU kernels only take fp32/fp64, so upcast half precision
+    # frames there; on the GPU they are resized as-is
+    out_dtype = frames.dtype
+    if not frames.is_cuda and out_dtype in (torch.float16, torch.bfloat16):
+        frames = frames.float()
+    
+    resized = F.interpolate(frames, size=(h, w), mode="bicubic", align_corners=False, antialias=True)
+    
+    # Bicubic can overshoot slightly; keep values in the 0-1 image range
+    return resized.clamp_(0, 1).to(out_dtype).permute(0, 2, 3, 1).contiguous()
+
+
+def _transition_length(overlap_frames: int, crossfade_frames: int,
+                       interpolation_frames: int) -> int:
+    """Number of trailing frames of the first clip that the transition replaces."""
+    if interpolation_frames > 0:
+        return 1
+    if crossfade_frames > 0:
+        return overlap_frames
+    return 0
+
+
+def _stitch_transition(tail_a: torch.Tensor, video_b: torch.Tensor,
+                       overlap_frames: int, crossfade_frames: int,
+                       interpolation_frames: int, interpolation_method: str) -> list:
+    """
+    Build the frames that follow the untouched part of the first clip.
+    
+    tail_a holds the last frames of the first clip (see _transition_length)
+    and is consumed by the transition. Returns a list of tensors to append.
+    """
+    if interpolation_frames > 0:
+        # With interpolation: interpolated + B (without first frame)
+        interpolated = interpolate_frames(
+            tail_a[-1], video_b[0],
+            interpolation_frames,
+            interpolation_method
+        )
+        return [interpolated, video_b[1:]]
+    
+    if crossfade_frames > 0:
+        # Without interpolation but with crossfade over the overlap zone
+        transition_end_b = min(overlap_frames, video_b.shape[0])
+        transition = crossfade_sequences(
+            tail_a, video_b[:transition_end_b],
+            min(crossfade_frames, overlap_frames),
+            interpolation_method
+        )
+        return [transition, video_b[transition_end_b:]]
+    
+    # No interpolation or crossfade - simple concatenation
+    return [video_b]
+
+
+def _pop_tail(parts: list, num_frames: int) -> torch.Tensor:
+    """Remove the last num_frames frames from a list of clip segments and return them."""
+    tail = []
+    while num_frames > 0 and parts:
+        last = parts.pop()
+        if last.shape[0] > num_frames:
+            parts.append(last[:-num_frames])
+            last = last[-num_frames:]
+        tail.append(last)
+        num_frames -= last.shape[0]
+    
+    if not tail:
+        return parts[-1][:0]
+    tail.reverse()
+    return tail[0] if len(tail) == 1 else torch.cat(tail, dim=0)
 
 
 def stitch_two_videos(video_a: torch.Tensor, video_b: torch.Tensor,
@@ -148,49 +320,16 @@ def stitch_two_videos(video_a: torch.Tensor, video_b: torch.Tensor,
     # Handle size mismatch
     video_b = resize_video_to_match(video_a, video_b)
     
-    # Last frame of A and first frame of B for interpolation
-    last_frame_a = video_a[-1]
-    first_frame_b = video_b[0]
-    
-    # Generate interpolated frames
-    interpolated = interpolate_frames(
-        last_frame_a, first_frame_b, 
-        interpolation_frames, 
-        interpolation_method
-    )
-    
-    if interpolation_frames > 0 and interpolated:
-        # With interpolation: A (without last frame) + interpolated + B (without first frame)
-        parts = [video_a[:-1]]
-        parts.append(torch.stack(interpolated, dim=0))
-        parts.append(video_b[1:])
-    elif crossfade_frames > 0:
-        # Without interpolation but with crossfade
-        transition_start_a = max(0, len_a - overlap_frames)
-        transition_end_b = min(overlap_frames, len_b)
-        
-        pre_transition = video_a[:transition_start_a]
-        overlap_a = video_a[transition_start_a:]
-        overlap_b = video_b[:transition_end_b]
-        post_transition = video_b[transition_end_b:]
-        
-        transition = crossfade_sequences(
-            overlap_a, overlap_b, 
-            min(crossfade_frames, overlap_frames),
-            interpolation_method
-        )
-        
-        parts = []
-        if pre_transition.shape[0] > 0:
-            parts.append(pre_transition)
-        parts.append(transition)
-        if post_transition.shape[0] > 0:
-            parts.append(post_transition)
-    else:
-        # No interpolation or crossfade - simple concatenation
-        parts = [video_a, video_b]
+    # A (without the frames the transition replaces) + transition + rest of B
+    split = len_a - min(_transition_length(overlap_frames, crossfade_frames, interpolation_frames), len_a)
+    parts = [video_a[:split]]
+    parts.extend(_stitch_transition(
+        video_a[split:], video_b,
+        overlap_frames, crossfade_frames,
+        interpolation_frames, interpolation_method
+    ))
     
-    result = torch.cat([p for p in parts if p.shape[0] > 0], dim=0)
+    result = torch.cat(parts, dim=0)
     logger.info(f"Stitched result: {result.shape[0]} frames")
     
     return result
@@ -400,21 +539,44 @@ class VideoStitchMultiple(io.ComfyNode):
         logger.info(f"Settings: interp={interpolation_frames}, crossfade={crossfade_frames}, overlap={overlap_frames}, method={interpolation_method}")
         
         # Start with first video
-        result = all_videos[0]
-        logger.info(f"Starting with video_1: {result.shape[0]} frames, {result.shape[1]}x{result.shape[2]}")
+        first_video = all_videos[0]
+        logger.info(f"Starting with video_1: {first_video.shape[0]} frames, {first_video.shape[1]}x{first_video.shape[2]}")
+        
+        # Bring every clip to video_1's device and resolution in one pass up
+        # front, so no stitch step has to move data between host and GPU;
+        # clips that already match (the common case) pass through untouched.
+        # Host->GPU copies are queued asynchronously ahead of the blend kernels,
+        # GPU->host copies must stay synchronous to be safe to read.
+        target_device = first_video.device
+        non_blocking = target_device.type == "cuda"
+        target_shape = first_video.shape[1:]
+        all_videos = [
+            vid.to(target_device, non_blocking=non_blocking) for vid in all_videos
+        ]
+        all_videos = [
+            vid if vid.shape[1:] == target_shape else resize_video_to_match(first_video, vid)
+            for vid in all_videos
+        ]
+        
+        # Keep the output as a list of segments and concatenate once at the end,
+        # instead of re-copying the whole growing video for every clip
+        parts = [first_video]
+        tail_length = _transition_length(overlap_frames, crossfade_frames, interpolation_frames)
         
         # Stitch each subsequent video
         for i, next_video in enumerate(all_videos[1:], start=2):
             logger.info(f"Stitching video_{i} ({next_video.shape[0]} frames)...")
             
-            result = stitch_two_videos(
-                result, next_video,
+            tail = _pop_tail(parts, tail_length)
+            parts.extend(_stitch_transition(
+                tail, next_video,
                 overlap_frames, crossfade_frames,
                 interpolation_frames, interpolation_method
-            )
+            ))
             
-            logger.info(f"After stitching video_{i}: {result.shape[0]} total frames")
+            logger.info(f"After stitching video_{i}: {sum(p.shape[0] for p in parts)} total frames")
         
+        result = torch.cat(parts, dim=0)
         total_frames = result.shape[0]
         
         logger.info("=" * 60)
@@ -479,25 +641,11 @@ class VideoFrameBlender(io.ComfyNode):
         # Handle size mismatch
         b = resize_video_to_match(a, b)
         
-        if blend_mode == "mix":
-            result = a * (1 - blend_factor) + b * blend_factor
-        elif blend_mode == "add":
-            result = torch.clamp(a + b * blend_factor, 0, 1)
-        elif blend_mode == "multiply":
-            result = a * (b * blend_factor + (1 - blend_factor))
-        elif blend_mode == "screen":
-            result = 1 - (1 - a) * (1 - b * blend_factor)
-        elif blend_mode == "overlay":
-            mask = a < 0.5
-            result = torch.where(
-                mask,
-                2 * a * b * blend_factor,
-                1 - 2 * (1 - a) * (1 - b * blend_factor)
-            )
-        else:
-            result = a * (1 - blend_factor) + b * blend_factor
+        # Blend in reduced precision where it pays off, return in the input dtype
+        factor = torch.tensor(blend_factor, device=a.device)
+        result = _blend_kernel(a, b, factor, blend_mode, _blend_dtype(a))
         
-        return io.NodeOutput(torch.clamp(result, 0, 1))
+        return io.NodeOutput(result)
 
 
 class VideoLoopSeamless(io.ComfyNode):
@@ -550,33 +698,16 @@ class VideoLoopSeamless(io.ComfyNode):
         # Get start and end regions
         start_region = video[:blend_frames]
         end_region = video[-blend_frames:]
-        middle = video[blend_frames:-blend_frames]
-        
-        # Create blended transition
-        blended = []
-        for i in range(blend_frames):
-            t = i / (blend_frames - 1)
-            
-            if blend_curve == "linear":
-                alpha = t
-            elif blend_curve == "ease_in_out":
-                alpha = t * t * (3 - 2 * t)
-            elif blend_curve == "cosine":
-                alpha = (1 - np.cos(t * np.pi)) / 2
-            else:
-                alpha = t
-            
-            # Blend end frame towards start frame
-            frame = end_region[i] * (1 - alpha) + start_region[i] * alpha
-            blended.append(frame)
         
-        blended_tensor = torch.stack(blended, dim=0)
+        # Output is start + middle (i.e. everything before the end region)
+        # followed by the blended transition, written into one tensor
+        result = video.new_empty(video.shape)
+        result[:-blend_frames].copy_(video[:-blend_frames])
         
-        # Combine: start + middle + blended transition
-        if middle.shape[0] > 0:
-            result = torch.cat([start_region, middle, blended_tensor], dim=0)
-        else:
-            result = torch.cat([start_region, blended_tensor], dim=0)
+        # Blend end frames towards start frames in one broadcasted op
+        alpha = _alpha_curve(blend_frames, blend_curve, video.device, video.dtype,
+                             include_endpoints=True)
+        _lerp_frames(end_region, start_region, alpha, out=result[-blend_frames:])
         
         logger.info(f"Created seamless loop: {result.shape[0]} frames with {blend_frames} frame blend")
         
@@ -26,6 +26,7 @@ function createDrawerHTML() {
                     <option value="unsplash">⭐ Unsplash (FREE High-Res!)</option>
                     <option value="freepik">Freepik (Preview Size ~626px)</option>
                     <option value="pixabay">Pixabay</option>
+                    <option value="all">All sources (uses saved keys)</option>
                 </select>
                 <small id="source-info" style="color: #4a9eff; font-size: 11px; display: block; margin-top: 4px;">
                     ⭐ Unsplash provides FREE high-resolution images (2000-4000px)!
@@ -170,12 +171,22 @@ function openWebScraperDrawer() {
                 } else {
                     apiKeyInput.value = "";
                 }
+                apiKeyInput.disabled = source === "all";
                 
                 const sourceInfo = document.getElementById("source-info");
                 const helpText = document.getElementById("api-key-help");
                 
                 // Update placeholder, help text, and source info based on selection
-                if (source === "freepik") {
+                if (source === "all") {
+                    apiKeyInput.placeholder = "Uses the saved key of each source";
+                    if (helpText) {
+                        helpText.innerHTML = 'Select each source once and start a scrape with its key to save it.';
+                    }
+                    if (sourceInfo) {
+                        sourceInfo.innerHTML = 'Searches every source with a saved API key at the same time.';
+                        sourceInfo.style.color = '#888';
+                    }
+                } else if (source === "freepik") {
                     apiKeyInput.placeholder = "Enter your Freepik API key";
                     if (helpText) {
                         helpText.innerHTML = 'Get your API key from <a href="https://www.freepik.com/developers/dashboard/api-key" target="_blank" style="color: #4a9eff;">Freepik Developers</a>';
@@ -231,20 +242,34 @@ async function startScraping() {
     }
     
     const source = document.getElementById("scraper-source").value;
-    const apiKey = document.getElementById("scraper-api-key").value.trim();
+    const apiKey = source === "all" ? "" : document.getElementById("scraper-api-key").value.trim();
     
-    if (!apiKey) {
-        alert(`Please enter your ${source} API key`);
-        return;
+    // "All sources" sends the saved key of every source
+    const apiKeys = {};
+    if (source === "all") {
+        for (const name of ["unsplash", "freepik", "pixabay"]) {
+            const savedKey = localStorage.getItem(`api_key_${name}`);
+            if (savedKey) apiKeys[name] = savedKey;
+        }
+        if (Object.keys(apiKeys).length === 0) {
+            alert("No saved API keys yet. Run a scrape with each source's key first.");
+            return;
+        }
+    } else {
+        if (!apiKey) {
+            alert(`Please enter your ${source} API key`);
+            return;
+        }
+        
+        // Save API key to localStorage
+        localStorage.setItem(`api_key_${source}`, apiKey);
     }
     
-    // Save API key to localStorage
-    localStorage.setItem(`api_key_${source}`, apiKey);
-    
     const params = {
         query,
         source: source,
         api_key: apiKey,
+        api_keys: apiKeys,
         category: document.getElementById("scraper-category").value,
         min_width: parseInt(document.getElementById("scraper-min-width").value),
         min_height: parseInt(document.getElementById("scraper-min-height").value),
@@ -639,8 +664,9 @@ if (!app.extensionManager.sidebarTabs || !app.extensionManager.sidebarTabs.find(
                         imgElement.style.objectFit = 'contain';
                         imgElement.style.display = 'block';
                         
-                        // Construct image URL - use our custom endpoint for reliable serving
-                        imgElement.src = `/webscraper/library/image/${img.id}`;
+                        // Static URL from the server when the file is inside the library,
+                        // otherwise our id-based endpoint
+                        imgElement.src = img.url || `/webscraper/library/image/${img.id}`;
                         
                         imgElement.onerror = () => {
                             imgElement.style.display = 'none';
@@ -852,7 +878,7 @@ function showImagePreview(imageData) {
     content.onclick = (e) => e.stopPropagation();
     
     const img = document.createElement('img');
-    img.src = `/webscraper/library/image/${imageData.id}`;
+    img.src = imageData.url || `/webscraper/library/image/${imageData.id}`;
     img.style.maxWidth = '100%';
     img.style.maxHeight = '90vh';
     img.style.objectFit = 'contain';
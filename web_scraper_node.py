@@ -7,16 +7,130 @@ with configurable parameters through a drawer UI
 from __future__ import annotations
 
 import os
+import re
+import sys
 import json
+import time
+import math
 import logging
 import asyncio
-from typing import Optional, Dict, Any
+import functools
+import hashlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 from typing_extensions import override
 
+import aiohttp
+
 from comfy_api.latest import ComfyExtension, io
 
+# Optional: faster parsing of API responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Source API endpoints
+# Freepik documentation: https://docs.freepik.com/api-reference/resources/get-all-resources
+FREEPIK_SEARCH_URL = "https://api.freepik.com/v1/resources"
+FREEPIK_DOWNLOAD_URL = "https://api.freepik.com/v1/resources/{resource_id}/download"
+PIXABAY_SEARCH_URL = "https://pixabay.com/api/"
+UNSPLASH_SEARCH_URL = "https://api.unsplash.com/search/photos"
+
+# Environment variable holding each source's API key. source="all" searches
+# every source that has a key, in this order of preference.
+SOURCE_API_KEY_ENV = {
+    "unsplash": "UNSPLASH_ACCESS_KEY",
+    "freepik": "FREEPIK_API_KEY",
+    "pixabay": "PIXABAY_API_KEY",
+}
+
+# Polite request rate against each source's API (requests per second), with
+# short bursts of up to SOURCE_RATE_BURST. Pixabay allows 100 per minute.
+SOURCE_RATE_LIMITS = {
+    "unsplash": 5.0,
+    "freepik": 5.0,
+    "pixabay": 1.5,
+}
+SOURCE_RATE_BURST = 2
+
+# Shared connection pool for a scraping run: keep-alive connections and
+# cached DNS lookups are reused across every API call and download
+HTTP_CONNECTION_LIMIT = 32
+HTTP_CONNECTION_LIMIT_PER_HOST = 8
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds
+HTTP_DNS_CACHE_TTL = 300  # seconds
+
+API_TIMEOUT = aiohttp.ClientTimeout(total=10)
+API_MAX_RETRIES = 2
+API_RETRY_BACKOFF = 0.3  # seconds, doubled on every retry
+API_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=30)
+# Received data is written in blocks of about this size, so a typical image
+# takes one or two write calls however the network happened to split it
+DOWNLOAD_WRITE_SIZE = 1 << 20
+# Downloads announcing more than this are skipped without reading the body
+MAX_IMAGE_BYTES = 100 * 1024 * 1024
+# Content types accepted for a download; CDNs often serve images as
+# generic binary data
+_DOWNLOAD_CONTENT_TYPES = ("image/", "application/octet-stream", "binary/octet-stream")
+
+# Images searched/downloaded at the same time within one scraping run
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Downloaded images written to the library per transaction
+LIBRARY_BATCH_SIZE = 32
+
+# Search results requested per API call; filtered candidates from one page
+# feed several images before the next page is needed, so large pages keep
+# the number of search calls per run low. Unsplash caps per_page at 30.
+RESULTS_PER_PAGE = 50
+SOURCE_MAX_PER_PAGE = {"unsplash": 30}
+MAX_PAGES_PER_IMAGE = 10
+
+# Successful search responses are reused for a while, keyed by
+# (source, query, page, per_page, min_width, min_height)
+API_CACHE_TTL = 300  # seconds
+API_CACHE_MAX_ENTRIES = 256
+
+# Downloaded images, keyed by Freepik resource id or image URL, so repeat
+# queries skip files that are already in the download directory. Stored as
+# append-only JSON lines ({"key": ..., "path": ...}), later lines winning.
+URL_INDEX_FILENAME = ".url_index.ndjson"
+
+# Saved file extension by image MIME subtype (or URL extension without the dot)
+_IMAGE_EXTENSIONS = {
+    "jpeg": ".jpg",
+    "jpg": ".jpg",
+    "pjpeg": ".jpg",
+    "png": ".png",
+    "webp": ".webp",
+    "avif": ".avif",
+}
+# Image extension at the end of a URL's path (before any query or fragment)
+_URL_IMAGE_EXT_RE = re.compile(r"\.(jpe?g|png|webp|avif)(?=[?#]|$)", re.IGNORECASE)
+
+# Client-side Freepik filters, compiled once and run against lowercased
+# title/url/filename/author strings. "ai" only counts as a whole word, so
+# words like "mountain" or "painting" are not mistaken for AI content.
+_AI_TITLE_RE = re.compile(
+    r"\bai\b|midjourney|dall-e|stable diffusion"
+    r"|^(?=.*generated)(?=.*(?:artificial|machine))"
+)
+_AI_URL_RE = re.compile(r"/ai-|ai-image|ai-generated")
+_AI_AUTHOR_RE = re.compile(r"\bai\b|generator")
+_AI_SLUG_RE = re.compile(r"\bai\b")
+# Leading word boundary only, so plurals ("icons", "vectors") still match
+_VECTOR_TITLE_RE = re.compile(r"\b(?:vector|icon|illustration|drawing|cartoon|animat(?:ed|ion))")
+_VECTOR_URL_RE = re.compile(r"/free-(?:vector|icon)")
+
+# Characters dropped from the query when it is used in a filename: anything
+# but letters, digits, spaces, "-" and "_"
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w \-]")
+
 
 class WebScraperNode(io.ComfyNode):
     """
@@ -54,24 +168,432 @@ class WebScraperNode(io.ComfyNode):
         return io.NodeOutput(f"Scraper session: {scraper_id}")
 
 
-# Store active scraping sessions
-_scraping_sessions: Dict[str, Dict[str, Any]] = {}
+class _ScrapeSession:
+    """
+    State of one scraping session
+    
+    Never modified in place: updates build a new instance with replace(), so
+    a status reader holding one always sees a consistent snapshot.
+    """
+    
+    __slots__ = ("status", "progress", "current_step", "total_images",
+                 "scraped_images", "errors", "running", "created_at", "last_access")
+    
+    # Fields reported to the UI
+    PUBLIC_FIELDS = ("status", "progress", "current_step", "total_images",
+                     "scraped_images", "errors")
+    
+    def __init__(self, now: float):
+        self.status = "idle"
+        self.progress = 0
+        self.current_step = ""
+        self.total_images = 0
+        self.scraped_images = 0
+        self.errors: Tuple[str, ...] = ()
+        # True from start_scraping until its task has ended, whatever the
+        # status says ("cancelled" is set while the task is still running)
+        self.running = False
+        self.created_at = now
+        self.last_access = now
+    
+    def replace(self, **fields) -> "_ScrapeSession":
+        """Copy of this session with fields changed"""
+        session = object.__new__(_ScrapeSession)
+        for name in self.__slots__:
+            setattr(session, name, fields.pop(name) if name in fields else getattr(self, name))
+        if fields:
+            raise TypeError(f"Unknown session fields: {', '.join(fields)}")
+        return session
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.PUBLIC_FIELDS}
+
+
+# Store active scraping sessions, least recently used first
+_scraping_sessions: "OrderedDict[str, _ScrapeSession]" = OrderedDict()
+
+# Finished sessions are dropped after this long without being touched, and
+# the store is capped so abandoned browser tabs can't grow it forever
+SESSION_TTL = 3600  # seconds
+MAX_SCRAPING_SESSIONS = 256
+_FINISHED_STATUSES = frozenset({"idle", "completed", "cancelled", "error"})
+
+
+class _ApiResponse:
+    """A fully read API response exposing the parts of the requests API we use"""
+    
+    __slots__ = ("status_code", "content")
+    
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+    
+    def json(self) -> Any:
+        if orjson is not None:
+            return orjson.loads(self.content)
+        return json.loads(self.content)
+
+
+def _dig(data: Any, *keys: str, default: Any = None) -> Any:
+    """
+    Walk nested API dicts in one pass: _dig(res, "image", "source", "url")
+    
+    Returns default as soon as a level is missing or not a dict, without
+    allocating throwaway {} defaults like chained .get(key, {}) calls do.
+    """
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
+
+
+def _accept_freepik_resource(res: Dict[str, Any], photos_only: bool, exclude_ai: bool) -> bool:
+    """
+    Client-side Freepik filter: True if the resource should be kept
+    
+    Every field is read and lowercased once, and checks run cheapest first,
+    returning on the first one that rejects the resource.
+    """
+    image_type = _dig(res, "image", "type", default="")
+    
+    # If photos_only is enabled, skip non-photos (but allow if type is empty/unknown,
+    # those are judged by the keyword checks below). This also covers vector/icon types.
+    if photos_only and image_type and image_type != "photo":
+        logger.debug("✗ Skipping %s - not a photo (type: %s)", res.get('id'), image_type)
+        return False
+    
+    if photos_only or exclude_ai:
+        title = (res.get("title") or "").lower()
+        url = (res.get("url") or "").lower()
+        filename = (res.get("filename") or "").lower()
+        
+        # Exclude vectors, icons, illustrations, animations
+        if photos_only and (_VECTOR_TITLE_RE.search(title) or
+                            _VECTOR_URL_RE.search(url) or
+                            "gif" in filename):
+            logger.debug("✗ Skipping %s - vector/animation-like content", res.get('id'))
+            return False
+        
+        # Exclude AI-generated images; some AI generators have specific author names
+        if exclude_ai:
+            author = res.get("author") or {}
+            if (_AI_TITLE_RE.search(title) or
+                    _AI_URL_RE.search(url) or
+                    "ai-generated" in filename or
+                    _AI_AUTHOR_RE.search((author.get("name") or "").lower()) or
+                    _AI_SLUG_RE.search((author.get("slug") or "").lower())):
+                logger.debug("✗ Skipping %s - AI-generated content detected", res.get('id'))
+                return False
+    
+    logger.debug("✓ ACCEPTED photo %s: '%s' (type: %s)", res.get('id'), (res.get('title') or 'N/A')[:60], image_type)
+    return True
+
+
+def _candidate_key(candidate: Any) -> str:
+    """Download index key for a search candidate (Freepik resource or image URL)"""
+    if isinstance(candidate, dict):
+        # Freepik download URLs are signed and change, the resource id does not
+        return f"freepik:{candidate.get('id')}"
+    return candidate
+
+
+def _load_url_index(path: Path) -> Dict[str, str]:
+    """Read the download index, or start an empty one if missing"""
+    loads = orjson.loads if orjson is not None else json.loads
+    index = {}
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                    index[record["key"]] = record["path"]
+                except (ValueError, KeyError, TypeError):
+                    # e.g. a line cut short by an interrupted write
+                    continue
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def _append_url_index(path: Path, entries: Dict[str, str]) -> None:
+    """Append new download index entries, one JSON line each"""
+    if not entries:
+        return
+    if orjson is not None:
+        data = b"".join(orjson.dumps({"key": k, "path": v}) + b"\n" for k, v in entries.items())
+    else:
+        data = "".join(json.dumps({"key": k, "path": v}) + "\n" for k, v in entries.items()).encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def _image_extension(content_type: str, url: str) -> str:
+    """File extension for a download, from its content type, else its URL"""
+    subtype = content_type.partition("/")[2].partition(";")[0].strip().lower()
+    ext = _IMAGE_EXTENSIONS.get(subtype)
+    if ext is None:
+        match = _URL_IMAGE_EXT_RE.search(url)
+        ext = _IMAGE_EXTENSIONS[match.group(1).lower()] if match else ".jpg"
+    return ext
+
+
+def _download_rejection(headers) -> Optional[str]:
+    """Reason to skip a download judging by its response headers, or None"""
+    content_type = headers.get("Content-Type", "")
+    if content_type and not content_type.lower().startswith(_DOWNLOAD_CONTENT_TYPES):
+        return f"Not an image (Content-Type: {content_type})"
+    
+    content_length = headers.get("Content-Length", "")
+    if content_length.isdigit():
+        size = int(content_length)
+        if size == 0:
+            return "Empty response"
+        if size > MAX_IMAGE_BYTES:
+            return f"Image too large ({size} bytes)"
+    return None
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """os.write until all of data is written"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _open_for_download(path: str, size_hint: Optional[int]) -> int:
+    """Open path for writing; reserve size_hint bytes up front where supported"""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    # A file that fits in one write block is allocated in one go anyway
+    if size_hint and size_hint > DOWNLOAD_WRITE_SIZE and hasattr(os, "posix_fallocate"):
+        try:
+            # One contiguous extent instead of growing block by block
+            os.posix_fallocate(fd, 0, size_hint)
+        except OSError:
+            pass  # e.g. unsupported by the filesystem; writes still work
+    return fd
+
+
+async def _stream_to_file(path: str, chunks, size_hint: Optional[int] = None) -> int:
+    """
+    Write an async iterable of byte chunks to path off the event loop
+    
+    Chunks are gathered into DOWNLOAD_WRITE_SIZE blocks and go straight to a
+    raw fd, skipping the buffered file object's extra copy. Opening, closing
+    and each write run on a worker thread, a write overlapping with receiving
+    the next block, so a slow disk stalls neither other downloads nor the
+    stream. Returns the number of bytes written. If the stream fails, the
+    partial file is deleted before the error is re-raised.
+    """
+    fd = await asyncio.to_thread(_open_for_download, path, size_hint)
+    failed = False
+    pending = None
+    block = []
+    block_size = 0
+    written = 0
+    
+    async def flush():
+        nonlocal pending, block, block_size, written
+        if pending is not None:
+            await pending
+        data = block[0] if len(block) == 1 else b"".join(block)
+        written += block_size
+        block, block_size = [], 0
+        pending = asyncio.ensure_future(asyncio.to_thread(_write_all, fd, data))
+    
+    try:
+        async for chunk in chunks:
+            block.append(chunk)
+            block_size += len(chunk)
+            if block_size >= DOWNLOAD_WRITE_SIZE:
+                await flush()
+        if block:
+            await flush()
+        if pending is not None:
+            await pending
+            pending = None
+        if size_hint and written != size_hint:
+            # Don't leave a preallocated tail of zeros behind
+            await asyncio.to_thread(os.ftruncate, fd, written)
+        return written
+    except BaseException:
+        # A failed download would otherwise leave a short file, or with
+        # preallocation a full-size one padded with zeros
+        failed = True
+        raise
+    finally:
+        try:
+            if pending is not None:
+                await pending
+        finally:
+            await asyncio.to_thread(os.close, fd)
+            if failed:
+                try:
+                    await asyncio.to_thread(os.unlink, path)
+                except OSError:
+                    pass
+
+
+class _Brief:
+    """
+    Truncated repr of an API payload for log messages
+    
+    Formatting only happens if the record is actually emitted, so it can be
+    passed as a %s argument without an isEnabledFor guard.
+    """
+    
+    __slots__ = ("obj", "limit")
+    
+    def __init__(self, obj: Any, limit: int = 500):
+        self.obj = obj
+        self.limit = limit
+    
+    def __str__(self) -> str:
+        text = repr(self.obj)
+        return text if len(text) <= self.limit else text[:self.limit] + "..."
+
+
+class _RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second, bursting to `burst`"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Wait for a token; waiters queue on the lock, so this is FIFO"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _api_get(http: aiohttp.ClientSession, url: str,
+                   limiter: Optional[_RateLimiter] = None, **kwargs) -> _ApiResponse:
+    """
+    GET an API endpoint on the shared session and read the whole body
+    
+    Rate limits, transient server errors and connection failures are retried
+    up to API_MAX_RETRIES times with exponential backoff. Every attempt waits
+    for a token from limiter, if given.
+    """
+    for attempt in range(API_MAX_RETRIES + 1):
+        last_attempt = attempt == API_MAX_RETRIES
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            async with http.get(url, timeout=API_TIMEOUT, **kwargs) as response:
+                if response.status not in API_RETRY_STATUSES or last_attempt:
+                    return _ApiResponse(response.status, await response.read())
+                logger.debug("API %s returned %s, retrying", url, response.status)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last_attempt:
+                raise
+        await asyncio.sleep(API_RETRY_BACKOFF * (2 ** attempt))
+
+
+# LRU order: oldest entry first
+_api_cache: "OrderedDict[tuple, Tuple[float, _ApiResponse]]" = OrderedDict()
+
+
+async def _cached_api_get(http: aiohttp.ClientSession, cache_key: tuple,
+                          url: str, **kwargs) -> _ApiResponse:
+    """
+    _api_get for search endpoints, served from _api_cache when possible
+    
+    Only 200 responses are stored, so errors and rate limits are retried.
+    """
+    now = time.monotonic()
+    entry = _api_cache.get(cache_key)
+    if entry is not None and now - entry[0] < API_CACHE_TTL:
+        _api_cache.move_to_end(cache_key)
+        return entry[1]
+    
+    response = await _api_get(http, url, **kwargs)
+    if response.status_code == 200:
+        _api_cache[cache_key] = (now, response)
+        _api_cache.move_to_end(cache_key)
+        while len(_api_cache) > API_CACHE_MAX_ENTRIES:
+            _api_cache.popitem(last=False)
+    return response
+
+
+@functools.lru_cache(maxsize=None)
+def _library_manager():
+    """
+    Import library_manager once and reuse it for every scrape
+    
+    Not a top-level import: library_manager imports webscraper_workflow, which
+    imports this module, so it can only be resolved once loading has finished.
+    """
+    try:
+        from . import library_manager
+    except ImportError:
+        # Loaded as a top-level module
+        node_dir = str(Path(__file__).parent)
+        if node_dir not in sys.path:
+            sys.path.insert(0, node_dir)
+        import library_manager
+    return library_manager
 
 
-def get_scraping_session(session_id: str) -> Dict[str, Any]:
+def _evict_sessions() -> None:
+    """Drop stale finished sessions, then trim the store to its size cap"""
+    now = time.monotonic()
+    for sid, session in list(_scraping_sessions.items()):
+        if (not session.running and session.status in _FINISHED_STATUSES
+                and now - session.last_access > SESSION_TTL):
+            del _scraping_sessions[sid]
+    
+    # Oldest first; a scrape whose task is still running is never evicted,
+    # even once it has been marked cancelled
+    for sid in list(_scraping_sessions):
+        if len(_scraping_sessions) < MAX_SCRAPING_SESSIONS:
+            break
+        session = _scraping_sessions[sid]
+        if not session.running and session.status in _FINISHED_STATUSES:
+            del _scraping_sessions[sid]
+
+
+def get_scraping_session(session_id: str) -> _ScrapeSession:
     """Get or create a scraping session"""
     if session_id not in _scraping_sessions:
-        _scraping_sessions[session_id] = {
-            "status": "idle",
-            "progress": 0,
-            "current_step": "",
-            "total_images": 0,
-            "scraped_images": 0,
-            "errors": []
-        }
+        _evict_sessions()
+        _scraping_sessions[session_id] = _ScrapeSession(time.monotonic())
+    else:
+        _scraping_sessions.move_to_end(session_id)
     return _scraping_sessions[session_id]
 
 
+def _update_session(session_id: str, **fields) -> _ScrapeSession:
+    """Apply field updates to a session as a single replacement"""
+    session = get_scraping_session(session_id).replace(**fields, last_access=time.monotonic())
+    _scraping_sessions[session_id] = session
+    return session
+
+
+def _add_session_error(session_id: str, message: str) -> None:
+    """Append an error message to a session (as a new tuple)"""
+    errors = get_scraping_session(session_id).errors
+    _update_session(session_id, errors=(*errors, message))
+
+
 async def start_scraping(
     session_id: str,
     query: str,
@@ -84,80 +606,135 @@ async def start_scraping(
     tags: list,
     api_key: str = None,
     exclude_ai: bool = True,
-    photos_only: bool = True
+    photos_only: bool = True,
+    api_keys: Optional[Dict[str, str]] = None
 ) -> Dict[str, Any]:
     """
     Start the scraping process
     This is called from the API route
+    
+    source is "freepik", "pixabay", "unsplash", or "all" to search every
+    source with an API key at once. api_key is the key for a single source,
+    api_keys optionally maps source names to keys (used with "all").
     """
-    session = get_scraping_session(session_id)
-    session["status"] = "scraping"
-    session["progress"] = 0
-    session["current_step"] = "Initializing scraper..."
-    session["total_images"] = max_images
-    session["scraped_images"] = 0
-    session["errors"] = []
+    _update_session(
+        session_id,
+        status="scraping",
+        progress=0,
+        current_step="Initializing scraper...",
+        total_images=max_images,
+        scraped_images=0,
+        errors=(),
+        running=True
+    )
     
     try:
-        # Import library manager
-        try:
-            from .library_manager import add_image_to_library
-        except ImportError:
-            import sys
-            from pathlib import Path
-            sys.path.insert(0, str(Path(__file__).parent))
-            from library_manager import add_image_to_library
+        if source != "all" and source not in SOURCE_API_KEY_ENV:
+            raise ValueError(
+                f"Unknown source '{source}'; expected one of: "
+                f"{', '.join(SOURCE_API_KEY_ENV)}, all"
+            )
         
-        import requests
-        import platform
-        from pathlib import Path
-        import time
+        library_manager = _library_manager()
+        build_image_row = library_manager.build_image_row
+        add_image_rows = library_manager.add_image_rows
         
         # Create download directory - use the same path as library_manager
-        try:
-            from .library_manager import DEFAULT_LIBRARY_PATH
-        except ImportError:
-            import sys
-            from pathlib import Path
-            sys.path.insert(0, str(Path(__file__).parent))
-            from library_manager import DEFAULT_LIBRARY_PATH
-        
-        download_dir = Path(DEFAULT_LIBRARY_PATH) / "scraped_images"
+        download_dir = Path(library_manager.DEFAULT_LIBRARY_PATH) / "scraped_images"
         download_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Download directory: {download_dir}")
         
-        session["current_step"] = f"Connecting to {source}..."
-        session["progress"] = 10
+        url_index_path = download_dir / URL_INDEX_FILENAME
+        url_index = _load_url_index(url_index_path)
+        new_index_entries = {}
+        
+        # Forget indexed images whose file has since been deleted, using one
+        # directory listing rather than a stat per candidate
+        with os.scandir(download_dir) as entries:
+            present_files = {entry.path for entry in entries if entry.is_file()}
+        url_index = {key: path for key, path in url_index.items() if path in present_files}
+        
+        _update_session(session_id, current_step=f"Connecting to {source}...", progress=10)
         
         scraped_count = 0
         
-        # Set API key from parameter
-        if api_key:
-            if source == "freepik":
-                os.environ["FREEPIK_API_KEY"] = api_key
-            elif source == "pixabay":
-                os.environ["PIXABAY_API_KEY"] = api_key
-            elif source == "unsplash":
-                os.environ["UNSPLASH_ACCESS_KEY"] = api_key
+        # Set API keys from parameters
+        given_keys = dict(api_keys or {})
+        if api_key and source in SOURCE_API_KEY_ENV:
+            given_keys[source] = api_key
+        for source_name, key in given_keys.items():
+            if key and source_name in SOURCE_API_KEY_ENV:
+                os.environ[SOURCE_API_KEY_ENV[source_name]] = key
         
-        # Helper function to get image URL from APIs
+        # Read the API keys once per run rather than on every request.
+        # Keys can change between runs (set from the UI above), so this is
+        # not a module-level constant.
+        api_keys = {
+            source_name: os.getenv(env_var, "")
+            for source_name, env_var in SOURCE_API_KEY_ENV.items()
+        }
+        # Cached search responses are keyed by a digest of the key that
+        # fetched them, so switching or revoking a key never serves the old
+        # key's results
+        api_key_ids = {
+            source_name: hashlib.sha256(key.encode()).hexdigest()
+            for source_name, key in api_keys.items()
+        }
+        
+        # Sources searched by this run; with "all" every page is requested
+        # from each of them concurrently and the results are pooled
+        if source == "all":
+            search_sources = [name for name, key in api_keys.items() if key]
+            if not search_sources:
+                raise ValueError("No API key set for any source")
+        else:
+            search_sources = [source]
+        
+        # Request pieces that only depend on the run settings, built once
+        api_headers = {
+            "freepik": {"x-freepik-api-key": api_keys["freepik"]},
+            "unsplash": {"Authorization": f"Client-ID {api_keys['unsplash']}"},
+        }
+        pixabay_params = {"key": api_keys["pixabay"], "image_type": "photo"}
+        if min_width > 0:
+            pixabay_params["min_width"] = min_width
+        if min_height > 0:
+            pixabay_params["min_height"] = min_height
+        
+        # API calls to each source share one token bucket for the whole run
+        rate_limiters = {
+            source_name: _RateLimiter(SOURCE_RATE_LIMITS[source_name], SOURCE_RATE_BURST)
+            for source_name in search_sources
+        }
+        
+        # Library tags per source; shared by every image, never mutated
+        library_tags = {
+            source_name: [*(tags or []), query, source_name]
+            for source_name in search_sources
+        }
+        
+        # Filenames are <source>_<query>_<run start>_<image index><ext>;
+        # the index keeps them unique within a run
+        safe_query = _UNSAFE_FILENAME_RE.sub("", query).strip()[:20]
+        run_timestamp = int(time.time())
+        
+        # Search one results page. Returns the usable candidates on it: filtered
+        # resources for Freepik (resolved to a URL by resolve_freepik_url only
+        # when picked), image URLs for the other sources.
         # Note: exclude_ai and photos_only are captured from outer scope
-        def get_image_url_from_api(source_name, search_query, page_num, per_page=1):
-            """Get image URL from various APIs"""
+        async def fetch_page_candidates(http, source_name, search_query, page_num, per_page=RESULTS_PER_PAGE):
+            """Get candidate images for one search results page from various APIs"""
+            per_page = min(per_page, SOURCE_MAX_PER_PAGE.get(source_name, per_page))
+            cache_key = (source_name, api_key_ids[source_name], search_query, page_num,
+                         per_page, min_width, min_height)
             try:
                 if source_name == "freepik":
                     # Freepik API - requires API key
-                    api_key = os.getenv("FREEPIK_API_KEY", "")
+                    api_key = api_keys["freepik"]
                     if not api_key:
                         logger.error("Freepik API key not set!")
-                        return None
+                        return []
                     
-                    # Freepik API endpoint for searching
-                    # Documentation: https://docs.freepik.com/api-reference/resources/get-all-resources
-                    url = f"https://api.freepik.com/v1/resources"
-                    headers = {
-                        "x-freepik-api-key": api_key
-                    }
                     params = {
                         "term": search_query,  # Note: Freepik uses "term" not "search"
                         "page": page_num + 1,
@@ -171,8 +748,10 @@ async def start_scraping(
                     # This ensures we get results even if the API doesn't support the filter format
                     
                     logger.info(f"Freepik API request: search='{search_query}', page={page_num + 1}, exclude_ai={exclude_ai}, photos_only={photos_only}")
-                    logger.info(f"Request params: {params}")
-                    response = requests.get(url, headers=headers, params=params, timeout=10)
+                    logger.debug("Request params: %s", params)
+                    response = await _cached_api_get(http, cache_key, FREEPIK_SEARCH_URL,
+                                                     limiter=rate_limiters["freepik"],
+                                                     headers=api_headers["freepik"], params=params)
                     logger.info(f"Freepik API response status: {response.status_code}")
                     
                     # Check for API errors
@@ -180,99 +759,31 @@ async def start_scraping(
                         logger.error(f"Freepik API error {response.status_code}: {response.text[:500]}")
                         if response.status_code == 400:
                             logger.error("Bad request - check if filters parameter format is correct")
-                        return None
+                        return []
                     
                     if response.status_code == 200:
                         try:
                             data = response.json()
-                            logger.info(f"Freepik API response structure: {list(data.keys())}")
+                            logger.debug("Freepik API response structure: %s", list(data.keys()))
                             
                             # Freepik returns data in 'data' field
                             resources = data.get("data", [])
                             logger.info(f"Freepik API returned {len(resources)} resources")
                             
                             if len(resources) == 0:
-                                logger.warning(f"No resources returned from API. Response: {json.dumps(data, indent=2)[:500]}")
-                                return None
+                                logger.warning("No resources returned from API")
+                                logger.debug("Response: %s", _Brief(data))
+                                return []
                         except Exception as e:
                             logger.error(f"Error parsing API response: {e}")
                             logger.error(f"Response text: {response.text[:500]}")
-                            return None
+                            return []
                         
                         # Client-side filtering (backup to API filters)
-                        photo_resources = []
-                        for res in resources:
-                            image_type = res.get("image", {}).get("type", "")
-                            title = res.get("title", "").lower()
-                            url = res.get("url", "").lower()
-                            filename = res.get("filename", "").lower()
-                            
-                            # Check if it's a photo
-                            is_photo = image_type == "photo"
-                            
-                            # If photos_only is enabled, skip non-photos (but allow if type is empty/unknown)
-                            if photos_only:
-                                if image_type and image_type not in ["", None, "photo"]:
-                                    logger.info(f"✗ Skipping {res.get('id')} - not a photo (type: {image_type})")
-                                    continue
-                                # If type is empty/None, we'll check other indicators below
-                            
-                            # Exclude AI-generated images if exclude_ai is enabled
-                            if exclude_ai:
-                                is_ai_generated = (
-                                    "ai" in title or 
-                                    "ai-generated" in title or
-                                    "ai-generated" in url or
-                                    "ai-generated" in filename or
-                                    ("generated" in title and ("ai" in title or "artificial" in title or "machine" in title)) or
-                                    "midjourney" in title or
-                                    "dall-e" in title or
-                                    "stable diffusion" in title or
-                                    "/ai-" in url or  # Freepik AI images often have /ai- in URL
-                                    "ai-image" in url
-                                )
-                                
-                                # Check author - some AI generators have specific author names
-                                author = res.get("author", {})
-                                author_name = author.get("name", "").lower() if author else ""
-                                author_slug = author.get("slug", "").lower() if author else ""
-                                is_ai_author = (
-                                    "ai" in author_name or 
-                                    "generator" in author_name or
-                                    "ai" in author_slug
-                                )
-                                
-                                # Check URL pattern for AI
-                                is_ai_url = "/ai-generated/" in url or "/ai-" in url
-                                
-                                if is_ai_generated or is_ai_author or is_ai_url:
-                                    logger.info(f"✗ Skipping {res.get('id')} - AI-generated content detected")
-                                    continue
-                            
-                            # Exclude vectors, icons, illustrations, animations if photos_only is enabled
-                            if photos_only:
-                                is_vector_like = (
-                                    "vector" in title or
-                                    "icon" in title or
-                                    "illustration" in title or
-                                    "drawing" in title or
-                                    "cartoon" in title or
-                                    "animated" in title or
-                                    "animation" in title or
-                                    "gif" in filename or
-                                    "/free-vector" in url or
-                                    "/free-icon" in url or
-                                    image_type == "vector" or
-                                    image_type == "icon"
-                                )
-                                
-                                if is_vector_like:
-                                    logger.info(f"✗ Skipping {res.get('id')} - vector/animation-like content")
-                                    continue
-                            
-                            # Accept this resource
-                            photo_resources.append(res)
-                            logger.info(f"✓ ACCEPTED photo {res.get('id')}: '{res.get('title', 'N/A')[:60]}' (type: {image_type})")
+                        photo_resources = [
+                            res for res in resources
+                            if _accept_freepik_resource(res, photos_only, exclude_ai)
+                        ]
                         
                         logger.info(f"=== FILTERING SUMMARY ===")
                         logger.info(f"Total resources returned: {len(resources)}")
@@ -285,7 +796,7 @@ async def start_scraping(
                                 logger.warning(f"⚠️  No photos found! All {len(resources)} results were filtered out.")
                                 logger.warning(f"   Sample of what was returned:")
                                 for idx, res in enumerate(resources[:5]):  # Show first 5 for debugging
-                                    img_type = res.get('image', {}).get('type', 'unknown')
+                                    img_type = _dig(res, 'image', 'type', default='unknown')
                                     logger.warning(f"   [{idx+1}] ID: {res.get('id')}, Type: {img_type}, Title: {res.get('title', 'N/A')[:50]}")
                                     logger.warning(f"       URL: {res.get('url', 'N/A')[:100]}")
                                 logger.warning(f"   Filter settings: exclude_ai={exclude_ai}, photos_only={photos_only}")
@@ -293,123 +804,43 @@ async def start_scraping(
                             else:
                                 logger.error(f"⚠️  No resources returned from Freepik API!")
                                 logger.error(f"   Check: 1) API key is valid 2) Search query returns results 3) Network connection")
-                            return None
+                            return []
                         
-                        if photo_resources and len(photo_resources) > 0:
-                            resource = photo_resources[0]
-                            logger.info(f"Selected photo resource ID: {resource.get('id')}, Title: {resource.get('title', 'N/A')}")
-                            
-                            resource_id = resource.get("id")
-                            logger.info(f"Resource ID: {resource_id}")
-                            
-                            if resource_id:
-                                # Check available formats first
-                                available_formats = resource.get("meta", {}).get("available_formats", {})
-                                logger.info(f"Available formats for resource {resource_id}: {list(available_formats.keys())}")
-                                
-                                # Get download URL for this resource - try to get highest resolution
-                                download_url = f"https://api.freepik.com/v1/resources/{resource_id}/download"
-                                logger.info(f"Requesting download URL from: {download_url}")
-                                download_response = requests.get(download_url, headers=headers, timeout=10)
-                                logger.info(f"Download response status: {download_response.status_code}")
-                                
-                                if download_response.status_code == 200:
-                                    download_data = download_response.json()
-                                    logger.info(f"Download response structure: {list(download_data.keys())}")
-                                    logger.info(f"Full download response: {json.dumps(download_data, indent=2)[:1000]}...")
-                                    
-                                    # Try to find the best URL from the response
-                                    image_url = None
-                                    if "data" in download_data:
-                                        data = download_data["data"]
-                                        if isinstance(data, dict):
-                                            # Try various URL fields in order of preference
-                                            image_url = (
-                                                data.get("url") or 
-                                                data.get("signed_url") or 
-                                                data.get("download_url") or
-                                                data.get("high_res_url")
-                                            )
-                                        elif isinstance(data, list) and len(data) > 0:
-                                            # If data is a list, get the first item's URL
-                                            first_item = data[0]
-                                            if isinstance(first_item, dict):
-                                                image_url = first_item.get("url") or first_item.get("signed_url")
-                                    
-                                    if image_url:
-                                        logger.info(f"✓ Got Freepik download URL: {image_url[:150]}...")
-                                        return image_url
-                                    else:
-                                        logger.warning(f"Download URL not found in response. Full data: {json.dumps(download_data, indent=2)[:500]}")
-                                elif download_response.status_code == 402:
-                                    logger.warning("⚠️ Freepik download requires premium subscription for full resolution")
-                                    logger.warning("Using preview image instead (smaller resolution)")
-                                elif download_response.status_code == 403:
-                                    logger.warning("⚠️ Access forbidden - API key may not have download permissions")
-                                else:
-                                    logger.error(f"✗ Download request failed: {download_response.status_code} - {download_response.text[:300]}")
-                            
-                            # Fallback: try to get image URL directly from resource
-                            # Freepik API structure: resource.image.source.url
-                            image_obj = resource.get("image", {})
-                            if image_obj:
-                                source_obj = image_obj.get("source", {})
-                                if source_obj:
-                                    image_url = source_obj.get("url")
-                                    if image_url:
-                                        logger.info(f"✓ Using Freepik image.source.url: {image_url[:100]}...")
-                                        return image_url
-                            
-                            # Last resort: try other possible fields
-                            image_url = resource.get("url") or resource.get("image_url") or resource.get("preview_url") or resource.get("thumbnail_url")
-                            if image_url:
-                                logger.info(f"Using Freepik resource URL (fallback): {image_url[:100]}...")
-                                return image_url
-                            else:
-                                logger.error(f"✗ No image URL found in resource. Available keys: {list(resource.keys())}")
-                                logger.error(f"✗ Full resource structure: {json.dumps(resource, indent=2)[:2000]}")
-                        elif len(photo_resources) == 0:
-                            logger.warning(f"No photo resources found (found {len(resources)} total resources, but none are photos)")
-                            logger.warning(f"Resource types found: {[r.get('image', {}).get('type', 'unknown') for r in resources[:5]]}")
-                        else:
-                            logger.warning("No resources returned from Freepik API")
-                            logger.warning(f"Full API response: {json.dumps(data, indent=2)[:1000]}")
+                        return photo_resources
                     elif response.status_code == 401:
                         logger.error("Freepik API key is invalid or unauthorized. Check your API key.")
                     elif response.status_code == 429:
                         logger.error("Freepik rate limit reached.")
                     else:
                         logger.error(f"Freepik API error: {response.status_code} - {response.text[:200]}")
-                    return None
+                    return []
                     
                 elif source_name == "pixabay":
                     # Pixabay API requires a key - Get free API key from https://pixabay.com/api/docs/
-                    api_key = os.getenv("PIXABAY_API_KEY", "")
+                    api_key = api_keys["pixabay"]
                     if not api_key:
                         logger.error("Pixabay API key not set! Set PIXABAY_API_KEY environment variable.")
                         logger.error("Get a free key at: https://pixabay.com/api/docs/")
-                        return None
+                        return []
                     
-                    # Build URL with filters
-                    url = f"https://pixabay.com/api/?key={api_key}&q={search_query}&image_type=photo&per_page={per_page}&page={page_num + 1}"
-                    if min_width > 0:
-                        url += f"&min_width={min_width}"
-                    if min_height > 0:
-                        url += f"&min_height={min_height}"
+                    # Key and size filters are preassembled; aiohttp does the URL quoting
+                    params = {**pixabay_params, "q": search_query, "per_page": per_page, "page": page_num + 1}
                     
-                    logger.info(f"Pixabay API request: {url.replace(api_key, 'KEY_HIDDEN')}")
-                    response = requests.get(url, timeout=10)
+                    logger.info(f"Pixabay API request: q='{search_query}', page={page_num + 1}, min_width={min_width}, min_height={min_height}")
+                    response = await _cached_api_get(http, cache_key, PIXABAY_SEARCH_URL,
+                                                     limiter=rate_limiters["pixabay"], params=params)
                     logger.info(f"Pixabay API response status: {response.status_code}")
                     
                     if response.status_code == 200:
                         data = response.json()
                         logger.info(f"Pixabay API returned {len(data.get('hits', []))} hits")
                         if data.get("hits") and len(data["hits"]) > 0:
-                            # Get the largest image available
-                            hit = data["hits"][0]
-                            image_url = hit.get("largeImageURL") or hit.get("webformatURL") or hit.get("previewURL")
-                            logger.info(f"Selected image URL: {image_url}")
-                            return image_url
+                            # Get the largest image available for each hit
+                            image_urls = [
+                                hit.get("largeImageURL") or hit.get("webformatURL") or hit.get("previewURL")
+                                for hit in data["hits"]
+                            ]
+                            return [image_url for image_url in image_urls if image_url]
                         else:
                             logger.warning("No hits returned from Pixabay API")
                     elif response.status_code == 429:
@@ -423,23 +854,29 @@ async def start_scraping(
                             pass
                     else:
                         logger.error(f"Pixabay API returned status {response.status_code}: {response.text[:200]}")
-                    return None
+                    return []
                     
                 elif source_name == "unsplash":
                     # Unsplash provides FREE high-resolution images!
                     # Register at https://unsplash.com/developers to get a free API key
-                    access_key = os.getenv("UNSPLASH_ACCESS_KEY", "")
+                    access_key = api_keys["unsplash"]
                     if not access_key:
                         logger.warning("Unsplash API key not set. Set UNSPLASH_ACCESS_KEY environment variable.")
                         logger.warning("Register at https://unsplash.com/developers to get a FREE API key.")
                         logger.warning("Unsplash provides HIGH RESOLUTION images for free!")
-                        return None
+                        return []
                     
-                    url = f"https://api.unsplash.com/search/photos?query={search_query}&page={page_num + 1}&per_page=1&orientation=landscape"
-                    headers = {"Authorization": f"Client-ID {access_key}"}
+                    params = {
+                        "query": search_query,
+                        "page": page_num + 1,
+                        "per_page": per_page,
+                        "orientation": "landscape"
+                    }
                     
                     logger.info(f"Unsplash API request: query='{search_query}', page={page_num + 1}")
-                    response = requests.get(url, headers=headers, timeout=10)
+                    response = await _cached_api_get(http, cache_key, UNSPLASH_SEARCH_URL,
+                                                     limiter=rate_limiters["unsplash"],
+                                                     headers=api_headers["unsplash"], params=params)
                     logger.info(f"Unsplash API response status: {response.status_code}")
                     
                     if response.status_code == 200:
@@ -449,26 +886,24 @@ async def start_scraping(
                         logger.info(f"Unsplash API returned {len(results)} results (total: {total_results})")
                         
                         if results and len(results) > 0:
-                            result = results[0]
-                            urls = result.get("urls", {})
-                            
-                            # Get the highest resolution available
-                            # Order: raw > full > regular > small > thumb
-                            # raw = original upload, full = high quality, regular = 1080px wide
-                            image_url = (
-                                urls.get("full") or      # High quality (usually 2000-4000px)
-                                urls.get("regular") or   # 1080px wide
-                                urls.get("raw")          # Original (can be very large)
-                            )
-                            
-                            if image_url:
-                                # Get image dimensions from response
-                                width = result.get("width", "?")
-                                height = result.get("height", "?")
-                                logger.info(f"✓ Unsplash image: {width}x{height} - {image_url[:100]}...")
-                                return image_url
-                            else:
-                                logger.warning(f"No URL found in Unsplash result: {urls}")
+                            image_urls = []
+                            for result in results:
+                                urls = result.get("urls", {})
+                                
+                                # Get the highest resolution available
+                                # Order: raw > full > regular > small > thumb
+                                # raw = original upload, full = high quality, regular = 1080px wide
+                                image_url = (
+                                    urls.get("full") or      # High quality (usually 2000-4000px)
+                                    urls.get("regular") or   # 1080px wide
+                                    urls.get("raw")          # Original (can be very large)
+                                )
+                                
+                                if image_url:
+                                    image_urls.append(image_url)
+                                else:
+                                    logger.warning(f"No URL found in Unsplash result: {urls}")
+                            return image_urls
                         else:
                             logger.warning(f"No results from Unsplash for query: {search_query}")
                     elif response.status_code == 401:
@@ -477,149 +912,328 @@ async def start_scraping(
                         logger.error("Unsplash rate limit exceeded. Try again later.")
                     else:
                         logger.warning(f"Unsplash API returned status {response.status_code}: {response.text[:200]}")
-                    return None
+                    return []
                     
             except Exception as e:
                 logger.error(f"Error fetching from {source_name} API: {e}")
-                return None
+                return []
         
-        # Scrape images
+        async def resolve_freepik_url(http, resource):
+            """Turn a filtered Freepik resource into a downloadable image URL"""
+            logger.debug("Selected photo resource ID: %s, Title: %s", resource.get('id'), resource.get('title', 'N/A'))
+            
+            resource_id = resource.get("id")
+            logger.debug("Resource ID: %s", resource_id)
+            
+            if resource_id:
+                # Check available formats first
+                available_formats = _dig(resource, "meta", "available_formats", default={})
+                logger.debug("Available formats for resource %s: %s", resource_id, list(available_formats.keys()))
+                
+                # Get download URL for this resource - try to get highest resolution
+                download_url = FREEPIK_DOWNLOAD_URL.format(resource_id=resource_id)
+                logger.debug("Requesting download URL from: %s", download_url)
+                download_response = await _api_get(http, download_url, limiter=rate_limiters["freepik"],
+                                                 headers=api_headers["freepik"])
+                logger.debug("Download response status: %s", download_response.status_code)
+                
+                if download_response.status_code == 200:
+                    download_data = download_response.json()
+                    logger.debug("Download response: %s", _Brief(download_data))
+                    
+                    # Try to find the best URL from the response
+                    image_url = None
+                    if "data" in download_data:
+                        data = download_data["data"]
+                        if isinstance(data, dict):
+                            # Try various URL fields in order of preference
+                            image_url = (
+                                data.get("url") or 
+                                data.get("signed_url") or 
+                                data.get("download_url") or
+                                data.get("high_res_url")
+                            )
+                        elif isinstance(data, list) and len(data) > 0:
+                            # If data is a list, get the first item's URL
+                            first_item = data[0]
+                            if isinstance(first_item, dict):
+                                image_url = first_item.get("url") or first_item.get("signed_url")
+                    
+                    if image_url:
+                        logger.debug("✓ Got Freepik download URL: %s...", image_url[:150])
+                        return image_url
+                    else:
+                        logger.warning(f"Download URL not found in response. Keys: {list(download_data.keys())}")
+                elif download_response.status_code == 402:
+                    logger.warning("⚠️ Freepik download requires premium subscription for full resolution")
+                    logger.warning("Using preview image instead (smaller resolution)")
+                elif download_response.status_code == 403:
+                    logger.warning("⚠️ Access forbidden - API key may not have download permissions")
+                else:
+                    logger.error(f"✗ Download request failed: {download_response.status_code} - {download_response.text[:300]}")
+            
+            # Fallback: try to get image URL directly from resource
+            # Freepik API structure: resource.image.source.url
+            image_url = _dig(resource, "image", "source", "url")
+            if image_url:
+                logger.debug("✓ Using Freepik image.source.url: %s...", image_url[:100])
+                return image_url
+            
+            # Last resort: try other possible fields
+            image_url = resource.get("url") or resource.get("image_url") or resource.get("preview_url") or resource.get("thumbnail_url")
+            if image_url:
+                logger.debug("Using Freepik resource URL (fallback): %s...", image_url[:100])
+                return image_url
+            else:
+                logger.error(f"✗ No image URL found in resource. Available keys: {list(resource.keys())}")
+                logger.debug("Resource: %s", _Brief(resource))
+            return None
+        
+        # Each image is searched and downloaded by its own task; the semaphore
+        # bounds how many hit the source API at once. Search results are
+        # fetched into a shared pool of candidates (enough pages for the whole
+        # run up front, then a page at a time if filtering leaves too few), and
+        # pages are handed out from a shared counter so none is requested twice.
         page_num = 0
-        images_per_page = 1  # Get one image per API call
-        max_pages_to_try = max_images * 3  # Try up to 3x pages to find photos (in case we hit vectors)
+        candidates = deque()
+        completed_count = 0
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        # (index key, images row) pairs waiting for the next library commit
+        pending_rows = []
+        library_lock = asyncio.Lock()
         
-        for i in range(max_images):
-            if session["status"] == "cancelled":
-                break
-                
-            session["current_step"] = f"Downloading image {i+1}/{max_images} from {source}..."
-            session["progress"] = 10 + int((i / max_images) * 80)
+        def claim_page() -> int:
+            nonlocal page_num
+            page = page_num
+            page_num += 1
+            return page
+        
+        async def fetch_pages(http, count):
+            """Fetch the next count pages from every source concurrently; True if any had candidates"""
+            # One page number per round, searched on every source
+            pages = [claim_page() for _ in range(count)]
+            requests = [(page, source_name) for page in pages for source_name in search_sources]
+            results = await asyncio.gather(
+                *(fetch_page_candidates(http, source_name, query, page) for page, source_name in requests),
+                return_exceptions=True
+            )
             
-            # Try multiple pages if needed to find a photo
-            image_url = None
+            found = False
+            for (page, source_name), page_candidates in zip(requests, results):
+                if isinstance(page_candidates, Exception):
+                    logger.error(f"Error fetching from {source_name} page {page + 1}: {page_candidates}")
+                elif page_candidates:
+                    candidates.extend((source_name, candidate) for candidate in page_candidates)
+                    found = True
+            return found
+        
+        async def next_image_url(http, i):
+            """
+            Pop the next usable image, fetching search pages as needed
+            
+            Returns (image_url, index_key, source_name), or (None, None, None)
+            if nothing was found. Images already in the download index are
+            skipped without a request.
+            """
             pages_tried = 0
             
-            while not image_url and pages_tried < 10:  # Try up to 10 pages to find a photo
-                try:
-                    # Get image URL from API
-                    logger.info(f"Fetching image {i+1} from {source} API (page {page_num + 1}, attempt {pages_tried + 1})...")
-                    image_url = get_image_url_from_api(source, query, page_num)
+            while True:
+                while candidates:
+                    source_name, candidate = candidates.popleft()
+                    key = _candidate_key(candidate)
+                    known_path = url_index.get(key)
+                    if known_path:
+                        logger.debug("Skipping already downloaded image: %s", known_path)
+                        continue
                     
+                    if isinstance(candidate, str):
+                        return candidate, key, source_name
+                    try:
+                        image_url = await resolve_freepik_url(http, candidate)
+                    except Exception as e:
+                        logger.error(f"Error resolving Freepik resource {candidate.get('id')}: {e}")
+                        continue
                     if image_url:
-                        logger.info(f"✓ Found photo image on page {page_num + 1}")
-                        break
-                    else:
-                        logger.info(f"No photo found on page {page_num + 1}, trying next page...")
-                        page_num += 1
-                        pages_tried += 1
-                        await asyncio.sleep(0.2)  # Small delay between page requests
+                        return image_url, key, source_name
+                
+                if pages_tried >= MAX_PAGES_PER_IMAGE:
+                    error_msg = f"No photo images found from {source} for query '{query}' after trying {pages_tried} pages"
+                    logger.warning(error_msg)
+                    _add_session_error(session_id, f"Image {i+1}: {error_msg}")
+                    return None, None, None
+                
+                page = page_num
+                pages_tried += 1
+                logger.info(f"Fetching image {i+1} from {source} API (page {page + 1}, attempt {pages_tried})...")
+                if not await fetch_pages(http, 1):
+                    logger.info(f"No photo found on page {page + 1}, trying next page...")
+        
+        async def flush_library(force=False):
+            """Commit queued images to the library in one transaction"""
+            nonlocal scraped_count
+            async with library_lock:
+                if not pending_rows or (not force and len(pending_rows) < LIBRARY_BATCH_SIZE):
+                    return
+                batch = pending_rows[:]
+                pending_rows.clear()
+                try:
+                    # SQLite work, so keep it off the event loop
+                    await asyncio.to_thread(add_image_rows, [row for _, row in batch])
                 except Exception as e:
-                    logger.error(f"Error fetching from page {page_num + 1}: {e}")
-                    page_num += 1
-                    pages_tried += 1
-                    continue
+                    logger.error(f"✗ Failed to add {len(batch)} images to library: {e}", exc_info=True)
+                    _add_session_error(session_id, f"Failed to add {len(batch)} images to library: {str(e)}")
+                    # Counted when downloaded; they never made it in
+                    scraped_count -= len(batch)
+                    _update_session(session_id, scraped_images=scraped_count)
+                    return
+                for index_key, row in batch:
+                    new_index_entries[index_key] = row[1]
+                logger.debug("Committed %s images to library", len(batch))
+        
+        async def fetch_one(http, i):
+            """Run scrape_image for image i within the concurrency limit"""
+            nonlocal completed_count
+            async with semaphore:
+                if get_scraping_session(session_id).status == "cancelled":
+                    return
+                
+                _update_session(session_id, current_step=f"Downloading image {i+1}/{max_images} from {source}...")
+                try:
+                    await scrape_image(http, i)
+                finally:
+                    # Progress and count land in one snapshot per image
+                    completed_count += 1
+                    _update_session(
+                        session_id,
+                        progress=10 + int((completed_count / max_images) * 80),
+                        scraped_images=scraped_count
+                    )
+        
+        async def scrape_image(http, i):
+            """Find, download and queue image i for the library"""
+            nonlocal scraped_count
             
+            image_url, index_key, image_source = await next_image_url(http, i)
             if not image_url:
-                error_msg = f"No photo images found from {source} for query '{query}' after trying {pages_tried} pages"
-                logger.warning(error_msg)
-                session["errors"].append(f"Image {i+1}: {error_msg}")
-                page_num += 1
-                continue
+                return
             
             try:
-                logger.info(f"Got image URL: {image_url[:100]}...")
+                logger.debug("Got image URL: %s...", image_url[:100])
                 
                 # Download the image
-                logger.info(f"Downloading image from: {image_url}")
+                logger.debug("Downloading image from: %s", image_url)
                 
                 # For Freepik, we might need to handle redirects or special headers
                 headers_for_download = {}
-                if source == "freepik":
+                if image_source == "freepik":
                     # Some Freepik URLs might need referer or user-agent
                     headers_for_download = {
                         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                         "Referer": "https://www.freepik.com/"
                     }
                 
-                response = requests.get(image_url, headers=headers_for_download, timeout=30, stream=True, allow_redirects=True)
+                async with http.get(image_url, headers=headers_for_download,
+                                    timeout=DOWNLOAD_TIMEOUT) as response:
+                    # Leaving the block unread drops the body of a rejected response
+                    rejection = response.status == 200 and _download_rejection(response.headers)
+                    if rejection:
+                        logger.warning(f"Skipping image {i+1} from {image_url[:100]}: {rejection}")
+                        _add_session_error(session_id, f"Image {i+1}: {rejection}")
+                        image_path = None
+                    elif response.status == 200:
+                        # Determine file extension from content type or URL
+                        ext = _image_extension(response.headers.get('content-type', ''), image_url)
+                        
+                        # Create unique filename
+                        filename = f"{image_source}_{safe_query}_{run_timestamp}_{i}{ext}"
+                        # Plain str from here on: it is what the library and index store
+                        image_path = os.fspath(download_dir / filename)
+                        
+                        # Save image
+                        # Content-Length is only the file size when the body isn't encoded
+                        size_hint = None if "Content-Encoding" in response.headers else response.content_length
+                        file_size = await _stream_to_file(image_path, response.content.iter_any(), size_hint=size_hint)
+                        
+                        logger.debug("Saved image to: %s", image_path)
+                    else:
+                        logger.error(f"Failed to download image: HTTP {response.status}")
+                        logger.debug("Response headers: %s", response.headers)
+                        logger.error(f"Response text (first 500 chars): {(await response.text(errors='replace'))[:500]}")
+                        _add_session_error(session_id, f"Image {i+1}: Download failed (HTTP {response.status})")
+                        image_path = None
                 
-                if response.status_code == 200:
-                    # Determine file extension from content type or URL
-                    content_type = response.headers.get('content-type', '')
-                    ext = '.jpg'
-                    if 'png' in content_type:
-                        ext = '.png'
-                    elif 'webp' in content_type:
-                        ext = '.webp'
-                    elif image_url.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                        ext = os.path.splitext(image_url)[1] or '.jpg'
-                    
-                    # Create unique filename
-                    timestamp = int(time.time())
-                    safe_query = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).strip()[:20]
-                    filename = f"{source}_{safe_query}_{timestamp}_{i}{ext}"
-                    image_path = download_dir / filename
-                    
-                    # Save image
-                    with open(image_path, "wb") as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    logger.info(f"Saved image to: {image_path}")
-                    
-                    # Verify image was saved
-                    if os.path.exists(image_path) and os.path.getsize(image_path) > 0:
+                if image_path is not None:
+                    # Verify image was saved; the byte count from the write
+                    # loop answers this without going back to the filesystem
+                    if file_size > 0:
                         # Add to library
-                        all_tags = tags.copy() if tags else []
-                        all_tags.extend([query, source])
+                        all_tags = library_tags[image_source]
                         
-                        logger.info(f"Adding image to library: {image_path}")
-                        logger.info(f"  Category: {category}, Tags: {all_tags}, Source: {source}")
-                        logger.info(f"  File exists: {os.path.exists(image_path)}, Size: {os.path.getsize(image_path) if os.path.exists(image_path) else 0} bytes")
+                        logger.debug("Adding image to library: %s", image_path)
+                        logger.debug("  Category: %s, Tags: %s, Source: %s", category, all_tags, image_source)
+                        logger.debug("  Size: %s bytes", file_size)
                         
                         try:
-                            success = add_image_to_library(
-                                image_path=str(image_path),
+                            # PIL header read, so keep it off the event loop
+                            row = await asyncio.to_thread(
+                                build_image_row,
+                                image_path,
                                 category=category,
                                 tags=all_tags,
-                                source=source
+                                source=image_source
                             )
                             
-                            logger.info(f"add_image_to_library returned: {success}")
-                            
-                            if success:
+                            if row is not None:
+                                # Seen for the rest of the run right away;
+                                # persisted to the index once committed
+                                url_index[index_key] = image_path
+                                pending_rows.append((index_key, row))
+                                # Counted now so progress moves per image;
+                                # only the database write is batched
                                 scraped_count += 1
-                                session["scraped_images"] = scraped_count
-                                logger.info(f"✓ Successfully added image {i+1} to library: {filename}")
+                                logger.info(f"✓ Queued image {i+1} for library: {filename}")
+                                await flush_library()
                             else:
-                                logger.error(f"✗ add_image_to_library returned False for {image_path}")
-                                session["errors"].append(f"Image {i+1}: Failed to add to library (function returned False)")
+                                logger.error(f"✗ Could not read image metadata for {image_path}")
+                                _add_session_error(session_id, f"Image {i+1}: Failed to add to library (unreadable image)")
                         except Exception as e:
-                            logger.error(f"✗ Exception calling add_image_to_library: {e}", exc_info=True)
-                            session["errors"].append(f"Image {i+1}: Exception adding to library: {str(e)}")
+                            logger.error(f"✗ Exception adding image to library: {e}", exc_info=True)
+                            _add_session_error(session_id, f"Image {i+1}: Exception adding to library: {str(e)}")
                     else:
                         logger.error(f"Image file not saved properly: {image_path}")
-                        session["errors"].append(f"Image {i+1}: File save failed")
-                else:
-                    logger.error(f"Failed to download image: HTTP {response.status_code}")
-                    logger.error(f"Response headers: {dict(response.headers)}")
-                    logger.error(f"Response text (first 500 chars): {response.text[:500]}")
-                    session["errors"].append(f"Image {i+1}: Download failed (HTTP {response.status_code})")
-                
-                # Move to next page for next image
-                page_num += 1
-                await asyncio.sleep(0.5)  # Small delay between requests
-                
+                        _add_session_error(session_id, f"Image {i+1}: File save failed")
+            
             except Exception as e:
                 logger.error(f"Error scraping image {i+1}: {e}", exc_info=True)
-                session["errors"].append(f"Image {i+1}: {str(e)}")
-                page_num += 1
-                continue
+                _add_session_error(session_id, f"Image {i+1}: {str(e)}")
         
-        session["status"] = "completed"
-        session["progress"] = 100
-        session["current_step"] = f"Completed! Scraped {scraped_count} images."
+        # Scrape images over one pooled HTTP session
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL
+        )
+        try:
+            async with aiohttp.ClientSession(connector=connector) as http:
+                # Search enough pages for the whole run at once, then download
+                await fetch_pages(http, math.ceil(max_images / RESULTS_PER_PAGE))
+                
+                # Failures are recorded per image inside the tasks
+                await asyncio.gather(*(fetch_one(http, i) for i in range(max_images)),
+                                     return_exceptions=True)
+        finally:
+            # Keep what was downloaded even if the run was interrupted
+            await flush_library(force=True)
+            _append_url_index(url_index_path, new_index_entries)
+        
+        _update_session(
+            session_id,
+            status="completed",
+            progress=100,
+            current_step=f"Completed! Scraped {scraped_count} images.",
+            scraped_images=scraped_count
+        )
         
         logger.info(f"Scraping completed: {scraped_count}/{max_images} images successfully added to library")
         
@@ -631,19 +1245,26 @@ async def start_scraping(
         
     except Exception as e:
         logger.error(f"Scraping error: {e}", exc_info=True)
-        session["status"] = "error"
-        session["current_step"] = f"Error: {str(e)}"
-        session["errors"].append(str(e))
+        session = get_scraping_session(session_id)
+        _update_session(
+            session_id,
+            status="error",
+            current_step=f"Error: {str(e)}",
+            errors=(*session.errors, str(e))
+        )
         return {
             "success": False,
             "error": str(e)
         }
+    finally:
+        # Only now may the session be evicted
+        _update_session(session_id, running=False)
 
 
 def cancel_scraping(session_id: str) -> Dict[str, Any]:
     """Cancel an active scraping session"""
     if session_id in _scraping_sessions:
-        _scraping_sessions[session_id]["status"] = "cancelled"
+        _update_session(session_id, status="cancelled")
         return {"success": True, "message": "Scraping cancelled"}
     return {"success": False, "error": "Session not found"}
 
@@ -651,5 +1272,6 @@ def cancel_scraping(session_id: str) -> Dict[str, Any]:
 def get_scraping_status(session_id: str) -> Dict[str, Any]:
     """Get the current status of a scraping session"""
     if session_id in _scraping_sessions:
-        return _scraping_sessions[session_id]
+        _scraping_sessions.move_to_end(session_id)
+        return _scraping_sessions[session_id].to_dict()
     return {"error": "Session not found"}
@@ -7,13 +7,22 @@ Supports category-based search, keyword search, and machine name detection
 from __future__ import annotations
 
 import os
+import re
+import asyncio
 import json
+import random
 import logging
+import functools
+import mimetypes
 import platform
 import sqlite3
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import quote
 from datetime import datetime
 
 import numpy as np
@@ -21,6 +30,7 @@ import torch
 from PIL import Image, ImageSequence, ImageOps
 from typing_extensions import override
 
+import comfy.utils
 import folder_paths
 import node_helpers
 from comfy_api.latest import ComfyExtension, io, ui
@@ -35,6 +45,18 @@ try:
 except ImportError:
     PromptServer = None
 
+# Optional: faster JSON encoding for search results
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: libjpeg-turbo bindings for faster JPEG decoding
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+except ImportError:
+    TurboJPEG = None
+
 # Try to import video stitch nodes
 VideoStitchInterpolator = None
 VideoStitchMultiple = None
@@ -74,22 +96,164 @@ DEFAULT_CATEGORIES = [
     "art", "music", "science", "health", "education",
     "fashion", "vehicles", "landscapes", "cityscapes", "wildlife"
 ]
+_DEFAULT_CATEGORY_SET = frozenset(DEFAULT_CATEGORIES)
+
+# This machine's name, used as the default machine_name for new images
+HOSTNAME = platform.node()
+
+
+# Stored in PRAGMA user_version once _init_database has brought a database
+# up to date. Bump it whenever the schema setup below changes.
+SCHEMA_VERSION = 1
+
+# Per-connection SQLite tuning. journal_mode=WAL is persistent in the
+# database file and is set once in _init_database; these are not.
+SQLITE_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Full-text index over the searchable image columns, kept in sync with the
+# images table by triggers. Created only if SQLite was built with FTS5.
+_FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+        filename, tags, content='images', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS images_fts_insert AFTER INSERT ON images BEGIN
+        INSERT INTO images_fts(rowid, filename, tags) VALUES (new.id, new.filename, new.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS images_fts_delete AFTER DELETE ON images BEGIN
+        INSERT INTO images_fts(images_fts, rowid, filename, tags) VALUES ('delete', old.id, old.filename, old.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS images_fts_update AFTER UPDATE OF filename, tags ON images BEGIN
+        INSERT INTO images_fts(images_fts, rowid, filename, tags) VALUES ('delete', old.id, old.filename, old.tags);
+        INSERT INTO images_fts(rowid, filename, tags) VALUES (new.id, new.filename, new.tags);
+    END""",
+)
+
+# How long category / machine name lists are reused before re-querying.
+# Library writes invalidate them immediately (ImageLibraryManager.invalidate_cache).
+LOOKUP_CACHE_TTL = 60  # seconds
+
+# Words of a search query, as unicode61 tokenizes them
+_FTS_TOKEN_RE = re.compile(r"\w+")
+
+
+def _fts_match_query(search_query: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every word of the query as a prefix"""
+    tokens = _FTS_TOKEN_RE.findall(search_query)
+    return " ".join(f'"{token}"*' for token in tokens) or None
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> str:
+    """json.dumps, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+@functools.lru_cache(maxsize=None)
+def _search_sql(
+    match: bool,
+    like: bool,
+    machine_name: bool,
+    category: bool,
+    min_width: bool,
+    min_height: bool
+) -> str:
+    """
+    SQL text for one combination of search filters
+    
+    Built once per combination, and the identical text lets sqlite3's
+    per-connection statement cache reuse the prepared statement.
+    """
+    columns = ("images.id AS id, images.filename AS filename, images.filepath AS filepath, "
+               "images.category AS category, images.tags AS tags, images.source AS source, "
+               "images.resolution_width AS width, images.resolution_height AS height")
+    
+    if match:
+        query = f"SELECT {columns} FROM images_fts JOIN images ON images.id = images_fts.rowid"
+    else:
+        query = f"SELECT {columns} FROM images"
+    
+    if machine_name:
+        # (image_id, machine_name) is unique, so the join adds no duplicates
+        query += (" JOIN machine_names ON machine_names.image_id = images.id"
+                  " AND machine_names.machine_name = ?")
+    
+    query += " WHERE images_fts MATCH ?" if match else " WHERE 1=1"
+    
+    if category:
+        query += " AND images.category = ?"
+    
+    if like:
+        query += " AND (images.filename LIKE ? OR images.tags LIKE ?)"
+    
+    if min_width:
+        query += " AND images.resolution_width >= ?"
+    
+    if min_height:
+        query += " AND images.resolution_height >= ?"
+    
+    if match:
+        query += " ORDER BY bm25(images_fts) LIMIT ?"
+    else:
+        query += " ORDER BY images.created_at DESC LIMIT ?"
+    return query
 
 
 class ImageLibraryManager:
     """Manages the image library database and search functionality"""
     
+    # Distinct-value lookups, shared by every manager of the same database:
+    # (db_path, lookup name) -> (monotonic time, values)
+    _lookup_cache: Dict[tuple, tuple] = {}
+    
     def __init__(self, library_path: str = DEFAULT_LIBRARY_PATH):
         self.library_path = Path(library_path)
-        self.library_path.mkdir(parents=True, exist_ok=True)
         self.db_path = self.library_path / "library.db"
         self.metadata_dir = self.library_path / "metadata"
-        self.metadata_dir.mkdir(exist_ok=True)
+        # Creates library_path on the way
+        self.metadata_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
         self._init_database()
     
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the library database with tuned PRAGMAs"""
+        conn = sqlite3.connect(str(self.db_path))
+        for pragma in SQLITE_CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """
+        This thread's long-lived connection, for read-only queries
+        
+        Kept open across calls so lookups skip the open and PRAGMA setup, and
+        reuse SQLite's page and schema caches. Do not close it; writers that
+        need their own transaction should use connect() instead.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+        return conn
+    
     def _init_database(self):
         """Initialize SQLite database for image metadata"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.connect()
+        
+        # Up to date already: skip the DDL, just see whether FTS is there
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            self.fts_enabled = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'images_fts'"
+            ).fetchone() is not None
+            conn.close()
+            return
+        
+        # WAL avoids a full fsync per commit and lets readers run during writes
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -117,8 +281,23 @@ class ImageLibraryManager:
             )
         ''')
         
+        # Category filter with the default newest-first order; replaces the
+        # plain category index it is a superset of
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_images_cat_created ON images(category, created_at DESC)
+        ''')
+        
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_category ON images(category)
+            DROP INDEX IF EXISTS idx_category
+        ''')
+        
+        # Unfiltered browsing, newest first, walks this instead of sorting
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_images_created ON images(created_at DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_images_dims ON images(resolution_width, resolution_height)
         ''')
         
         cursor.execute('''
@@ -129,13 +308,72 @@ class ImageLibraryManager:
             CREATE INDEX IF NOT EXISTS idx_machine_name ON machine_names(machine_name)
         ''')
         
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_source ON images(source)
+        ''')
+        
+        # One row per (image, machine) so "INSERT OR IGNORE" really ignores
+        # repeats; also serves image_id lookups. Older databases may hold
+        # duplicates from before this index existed, so drop those first.
+        cursor.execute('''
+            DELETE FROM machine_names WHERE id NOT IN (
+                SELECT MIN(id) FROM machine_names GROUP BY image_id, machine_name
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_machine_image ON machine_names(image_id, machine_name)
+        ''')
+        
+        self.fts_enabled = self._init_fts(cursor)
+        
+        # Without FTS5, leave the version alone so the index is created as
+        # soon as an SQLite build that has it opens the database
+        if self.fts_enabled:
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        
         conn.commit()
+        # Refresh planner statistics for new indexes; only analyzes when stale
+        conn.execute("PRAGMA optimize")
         conn.close()
     
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the full-text search index if needed; False if FTS5 is unavailable"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'images_fts'")
+        is_new = cursor.fetchone() is None
+        try:
+            for statement in _FTS_SCHEMA:
+                cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 not available, using LIKE search: {e}")
+            return False
+        if is_new:
+            # Index the rows that existed before the table did
+            cursor.execute("INSERT INTO images_fts(images_fts) VALUES ('rebuild')")
+        return True
+    
+    def invalidate_cache(self) -> None:
+        """Drop cached lookups for this database; call after writing to it"""
+        for key in [key for key in self._lookup_cache if key[0] == self.db_path]:
+            self._lookup_cache.pop(key, None)
+    
+    def _cached_lookup(self, name: str, compute) -> List[str]:
+        """compute(), reused for LOOKUP_CACHE_TTL seconds"""
+        key = (self.db_path, name)
+        now = time.monotonic()
+        entry = self._lookup_cache.get(key)
+        if entry is not None and now - entry[0] < LOOKUP_CACHE_TTL:
+            return entry[1]
+        values = compute()
+        self._lookup_cache[key] = (now, values)
+        return values
+    
     def get_categories(self) -> List[str]:
         """Get all available categories from the database"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        return self._cached_lookup("categories", self._query_categories)
+    
+    def _query_categories(self) -> List[str]:
+        cursor = self.connection().cursor()
         
         cursor.execute('''
             SELECT DISTINCT category FROM images 
@@ -144,31 +382,39 @@ class ImageLibraryManager:
         ''')
         
         categories = [row[0] for row in cursor.fetchall()]
-        conn.close()
         
         # Add default categories if database is empty
         if not categories:
             return DEFAULT_CATEGORIES
-        return sorted(list(set(categories + DEFAULT_CATEGORIES)))
+        return sorted(_DEFAULT_CATEGORY_SET.union(categories))
     
     def get_machine_names(self) -> List[str]:
         """Extract machine names from the system and database"""
-        machine_names = []
+        return self._cached_lookup("machine_names", self._query_machine_names)
+    
+    def _query_machine_names(self) -> List[str]:
+        # Get machine names from database
+        cursor = self.connection().cursor()
+        cursor.execute('SELECT DISTINCT machine_name FROM machine_names WHERE machine_name IS NOT NULL')
+        machine_names = {row[0] for row in cursor.fetchall()}
         
         # Get system hostname
-        hostname = platform.node()
-        if hostname:
-            machine_names.append(hostname)
+        if HOSTNAME:
+            machine_names.add(HOSTNAME)
         
-        # Get machine names from database
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        cursor.execute('SELECT DISTINCT machine_name FROM machine_names WHERE machine_name IS NOT NULL')
-        db_names = [row[0] for row in cursor.fetchall()]
-        machine_names.extend(db_names)
-        conn.close()
+        return sorted(machine_names)
+    
+    def approx_count(self) -> int:
+        """
+        Upper bound on the number of images, without scanning the table
         
-        return sorted(list(set(machine_names)))
+        Reads the AUTOINCREMENT high-water mark, so deleted rows still count.
+        Use COUNT(*) where an exact figure matters.
+        """
+        cursor = self.connection().cursor()
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'images'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
     
     def search_images(
         self,
@@ -179,68 +425,76 @@ class ImageLibraryManager:
         min_height: Optional[int] = None,
         limit: int = 100
     ) -> List[Dict[str, Any]]:
-        """Search images in the library"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        """
+        Search images in the library
         
-        query = "SELECT id, filename, filepath, category, tags, source, resolution_width, resolution_height FROM images WHERE 1=1"
-        params = []
+        search_query matches words (and word prefixes) in filenames and tags
+        through the full-text index, best matches first. Without FTS5 it
+        falls back to a substring match, newest first.
+        """
+        cursor = self.connection().cursor()
+        # Rows come back keyed by the column aliases, ready to return as dicts
+        cursor.row_factory = sqlite3.Row
+        
+        match = _fts_match_query(search_query) if search_query and self.fts_enabled else None
+        like = bool(search_query) and not match
         
+        # Parameters in the order _search_sql places their placeholders
+        params = []
+        if machine_name:
+            params.append(machine_name)
+        if match:
+            params.append(match)
         if category:
-            query += " AND category = ?"
             params.append(category)
-        
-        if search_query:
-            query += " AND (filename LIKE ? OR tags LIKE ?)"
+        if like:
             search_pattern = f"%{search_query}%"
             params.extend([search_pattern, search_pattern])
-        
-        if machine_name:
-            query += """ AND id IN (
-                SELECT image_id FROM machine_names WHERE machine_name = ?
-            )"""
-            params.append(machine_name)
-        
         if min_width:
-            query += " AND resolution_width >= ?"
             params.append(min_width)
-        
         if min_height:
-            query += " AND resolution_height >= ?"
             params.append(min_height)
-        
-        query += " ORDER BY created_at DESC LIMIT ?"
         params.append(limit)
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
-        
-        images = []
-        for row in results:
-            images.append({
-                "id": row[0],
-                "filename": row[1],
-                "filepath": row[2],
-                "category": row[3],
-                "tags": row[4],
-                "source": row[5],
-                "width": row[6],
-                "height": row[7]
-            })
-        
-        return images
+        query = _search_sql(bool(match), like, bool(machine_name), bool(category),
+                            bool(min_width), bool(min_height))
+        return [dict(row) for row in cursor.execute(query, params)]
     
-    def get_image_files(self, search_results: List[Dict[str, Any]]) -> List[str]:
-        """Get list of image file paths from search results"""
-        files = []
+    def has_images(self) -> bool:
+        """Whether the library holds any image; stops at the first row"""
+        cursor = self.connection().cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM images)")
+        return bool(cursor.fetchone()[0])
+    
+    def get_image_path(self, image_id: int) -> Optional[str]:
+        """File path of the image with this id, or None if there is no such row"""
+        # One constant SQL string, so the connection's statement cache keeps
+        # it prepared across calls
+        cursor = self.connection().cursor()
+        cursor.execute("SELECT filepath FROM images WHERE id = ?", (image_id,))
+        result = cursor.fetchone()
+        return result[0] if result else None
+    
+    def existing_images(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Search results whose files are still on disk
+        
+        One stat per row, live, so case-insensitive filesystems and files
+        written a moment ago are judged the way opening them would be.
+        Async callers should run this in a worker thread.
+        """
+        found = []
         for result in search_results:
             filepath = result["filepath"]
             if os.path.exists(filepath):
-                files.append(filepath)
+                found.append(result)
             else:
                 logger.warning(f"Image file not found: {filepath}")
-        return files
+        return found
+    
+    def get_image_files(self, search_results: List[Dict[str, Any]]) -> List[str]:
+        """Get list of image file paths from search results"""
+        return [result["filepath"] for result in self.existing_images(search_results)]
 
 
 # Global library manager instance
@@ -254,34 +508,173 @@ def get_library_manager() -> ImageLibraryManager:
     return _library_manager
 
 
-def load_and_process_image(image_path: str) -> torch.Tensor:
-    """Load and process a single image file - matches ComfyUI's LoadImage node"""
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
+# Threads running the API routes' library queries. Each keeps one persistent
+# connection (see ImageLibraryManager.connection), so this bounds the read
+# connections, and their page caches, however many requests arrive at once.
+LIBRARY_DB_THREADS = min(4, os.cpu_count() or 1)
+_library_db_executor = ThreadPoolExecutor(
+    max_workers=LIBRARY_DB_THREADS,
+    thread_name_prefix="webscraper-db"
+)
+
+
+async def _run_library_db(func, *args, **kwargs):
+    """Run blocking library work on the database threads"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _library_db_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def _get_library_manager_async() -> ImageLibraryManager:
+    """get_library_manager for the API routes; first-time setup runs off the event loop"""
+    if _library_manager is not None:
+        return _library_manager
+    return await _run_library_db(get_library_manager)
+
+
+# Decoded images kept in memory, so flipping between a few library images
+# doesn't decode them again. Held as uint8; a 4K image is ~25 MB.
+IMAGE_CACHE_SIZE = 8
+
+# Threads decoding images for one batch; PIL and libjpeg-turbo release the
+# GIL while decoding, so these run in parallel
+MAX_LOAD_WORKERS = 8
+
+# Black placeholder returned when no image can be loaded. Shared rather than
+# allocated per call: node outputs are treated as read-only downstream.
+_PLACEHOLDER_IMAGE = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
+
+
+@functools.lru_cache(maxsize=None)
+def _jpeg_decoder():
+    """The shared TurboJPEG decoder, or None if it isn't available"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except Exception as e:
+        # The Python package is there but the libturbojpeg library isn't
+        logger.warning(f"PyTurboJPEG is installed but could not load libturbojpeg: {e}")
+        return None
+
+
+def _decode_jpeg(image_path: str) -> Optional[np.ndarray]:
+    """
+    Decode a JPEG to RGB uint8 pixels with libjpeg-turbo
     
-    img = node_helpers.pillow(Image.open, image_path)
+    Returns None when the PIL path should be used instead: no decoder, not a
+    JPEG, an EXIF rotation to apply, or a file libjpeg-turbo can't convert.
+    """
+    decoder = _jpeg_decoder()
+    if decoder is None or not image_path.lower().endswith((".jpg", ".jpeg")):
+        return None
+    try:
+        # Header only; EXIF orientation handling stays with PIL
+        with Image.open(image_path) as img:
+            if img.format != "JPEG" or img.getexif().get(0x0112, 1) != 1:
+                return None
+        with open(image_path, "rb") as f:
+            return decoder.decode(f.read(), pixel_format=TJPF_RGB)
+    except Exception as e:
+        logger.debug("TurboJPEG could not decode %s, using PIL: %s", image_path, e)
+        return None
+
+
+def load_and_process_image(image_path: str, as_float: bool = True) -> torch.Tensor:
+    """
+    Load and process a single image file - matches ComfyUI's LoadImage node
     
-    # Handle EXIF orientation (same as ComfyUI's LoadImage)
-    img = node_helpers.pillow(ImageOps.exif_transpose, img)
+    Returns a float32 [1, H, W, 3] tensor in 0-1, as IMAGE outputs expect.
+    With as_float=False it returns the decoded uint8 pixels instead, a
+    quarter of the size to move to a GPU; normalize them there with
+    to_float01(). Decodes are cached by path, modification time and size,
+    and the uint8 tensor is shared with later calls, so it must not be
+    modified in place.
+    """
+    try:
+        file_stat = os.stat(image_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Image not found: {image_path}") from None
+    pixels = _load_image_cached(image_path, file_stat.st_mtime_ns, file_stat.st_size)
+    return to_float01(pixels) if as_float else pixels
+
+
+def to_float01(image: torch.Tensor, device: Optional[torch.device] = None) -> torch.Tensor:
+    """
+    uint8 image tensor to float32 in 0-1, optionally on another device
     
-    # Handle different image modes (same as ComfyUI's LoadImage)
-    if img.mode == "I":
-        img = img.point(lambda i: i * (1 / 255))
+    The copy to device happens before the conversion, so only uint8 data
+    crosses the bus.
+    """
+    if device is not None:
+        image = image.to(device, non_blocking=True)
+    # One pass: scale and widen straight into the float32 result
+    normalized = torch.empty(image.shape, dtype=torch.float32, device=image.device)
+    return torch.mul(image, 1.0 / 255.0, out=normalized)
+
+
+def load_image_batch(image_paths: List[str]) -> torch.Tensor:
+    """
+    Load several image files into one float32 [B, H, W, 3] batch
     
-    # Convert to RGB
-    image = img.convert("RGB")
+    Files are decoded in parallel. Images that differ in size from the first
+    one are resized to match it, as a batch must share one shape.
+    """
+    workers = max(1, min(MAX_LOAD_WORKERS, len(image_paths)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        images = list(executor.map(load_and_process_image, image_paths))
     
-    # Convert to numpy array and normalize to 0-1 range
-    image = np.array(image).astype(np.float32) / 255.0
+    height, width = images[0].shape[1:3]
+    for i, image in enumerate(images):
+        if image.shape[1:3] != (height, width):
+            samples = image.movedim(-1, 1)
+            images[i] = comfy.utils.common_upscale(samples, width, height, "bilinear", "center").movedim(1, -1)
+    return torch.cat(images, dim=0)
+
+
+@functools.lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _load_image_cached(image_path: str, mtime_ns: int, size: int) -> torch.Tensor:
+    """Decode an image file to uint8 [1, H, W, 3]; mtime_ns and size only key the cache"""
+    pixels = _decode_jpeg(image_path)
+    if pixels is None:
+        img = node_helpers.pillow(Image.open, image_path)
+        
+        # Handle EXIF orientation (same as ComfyUI's LoadImage)
+        img = node_helpers.pillow(ImageOps.exif_transpose, img)
+        
+        # Handle different image modes (same as ComfyUI's LoadImage)
+        if img.mode == "I":
+            img = img.point(lambda i: i * (1 / 255))
+        
+        # Convert to RGB; a writable copy, as torch.from_numpy wants
+        pixels = np.array(img.convert("RGB"))
     
-    # Add batch dimension - result is [1, H, W, 3]
-    image = torch.from_numpy(image)[None,]
+    # Add batch dimension - result is [1, H, W, 3]. Normalization happens
+    # per call in to_float01, so the cache holds the compact uint8 pixels.
+    image = torch.from_numpy(pixels)[None,]
     
     logger.info(f"Loaded image: {image_path}, shape: {image.shape}, dtype: {image.dtype}")
     
     return image
 
 
+def _library_choices() -> Tuple[List[str], List[str]]:
+    """
+    Category and machine name options for the node schemas
+    
+    Served from the manager's lookup cache, so /object_info and workflow
+    loads don't query the database for every node definition.
+    """
+    # Fall back to defaults so the nodes load even if the database doesn't
+    # exist yet
+    try:
+        manager = get_library_manager()
+        return manager.get_categories(), manager.get_machine_names()
+    except Exception as e:
+        logger.warning(f"Could not initialize library manager in define_schema: {e}. Using defaults.")
+        return DEFAULT_CATEGORIES, [HOSTNAME] if HOSTNAME else []
+
+
 class LoadImageFromLibrary(io.ComfyNode):
     """
     Load images from the web scraper library
@@ -290,16 +683,7 @@ class LoadImageFromLibrary(io.ComfyNode):
     
     @classmethod
     def define_schema(cls):
-        # Get categories and machine names with error handling
-        # This allows the node to load even if the database doesn't exist yet
-        try:
-            manager = get_library_manager()
-            categories = manager.get_categories()
-            machine_names = manager.get_machine_names()
-        except Exception as e:
-            logger.warning(f"Could not initialize library manager in define_schema: {e}. Using defaults.")
-            categories = DEFAULT_CATEGORIES
-            machine_names = [platform.node()] if platform.node() else []
+        categories, machine_names = _library_choices()
         
         return io.Schema(
             node_id="LoadImageFromLibrary",
@@ -392,8 +776,6 @@ class LoadImageFromLibrary(io.ComfyNode):
         seed: int,
         selection_mode: str
     ) -> io.NodeOutput:
-        import random
-        
         manager = get_library_manager()
         
         # Clean up empty strings
@@ -414,16 +796,15 @@ class LoadImageFromLibrary(io.ComfyNode):
         if not search_results:
             logger.warning("No images found matching the search criteria")
             # Return a dummy image to prevent errors
-            dummy_image = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
-            return io.NodeOutput(dummy_image)
+            return io.NodeOutput(_PLACEHOLDER_IMAGE)
         
         logger.info(f"Found {len(search_results)} images matching criteria")
         
         # Apply selection mode - pick one image based on mode
         if selection_mode == "random":
-            # Use seed for reproducible random selection
-            random.seed(seed)
-            selected_index = random.randint(0, len(search_results) - 1)
+            # Use seed for reproducible random selection; a private generator
+            # leaves the global one alone for other nodes
+            selected_index = random.Random(seed).randrange(len(search_results))
             selected_result = search_results[selected_index]
             logger.info(f"Random selection (seed={seed}): picked image at index {selected_index}")
         else:  # "index" mode - use image_index
@@ -436,8 +817,7 @@ class LoadImageFromLibrary(io.ComfyNode):
         filepath = selected_result.get("filepath", "")
         if not filepath or not os.path.exists(filepath):
             logger.warning(f"Image file not found: {filepath}")
-            dummy_image = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
-            return io.NodeOutput(dummy_image)
+            return io.NodeOutput(_PLACEHOLDER_IMAGE)
         
         # Load the image
         try:
@@ -447,8 +827,128 @@ class LoadImageFromLibrary(io.ComfyNode):
             return io.NodeOutput(img_tensor)
         except Exception as e:
             logger.error(f"Error loading image {filepath}: {e}")
-            dummy_image = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
-            return io.NodeOutput(dummy_image)
+            return io.NodeOutput(_PLACEHOLDER_IMAGE)
+
+
+class LoadImagesFromLibrary(io.ComfyNode):
+    """
+    Load a batch of images from the web scraper library
+    Same filters as LoadImageFromLibrary; images are decoded in parallel
+    """
+    
+    @classmethod
+    def define_schema(cls):
+        categories, machine_names = _library_choices()
+        
+        return io.Schema(
+            node_id="LoadImagesFromLibrary",
+            display_name="Load Images from Library (Batch)",
+            category="webscraper",
+            inputs=[
+                io.Combo.Input(
+                    "category",
+                    options=[""] + categories,
+                    default="",
+                    tooltip="Filter images by category. Leave empty for all categories."
+                ),
+                io.String.Input(
+                    "search_query",
+                    default="",
+                    multiline=False,
+                    tooltip="Search images by filename or tags. Leave empty to show all."
+                ),
+                io.Combo.Input(
+                    "machine_name",
+                    options=[""] + machine_names,
+                    default="",
+                    tooltip="Filter images associated with a specific machine name. Leave empty for all machines."
+                ),
+                io.Int.Input(
+                    "min_width",
+                    default=0,
+                    min=0,
+                    max=8192,
+                    step=1,
+                    tooltip="Minimum image width in pixels"
+                ),
+                io.Int.Input(
+                    "min_height",
+                    default=0,
+                    min=0,
+                    max=8192,
+                    step=1,
+                    tooltip="Minimum image height in pixels"
+                ),
+                io.Int.Input(
+                    "batch_size",
+                    default=4,
+                    min=1,
+                    max=64,
+                    step=1,
+                    tooltip="Number of images to load. All images are resized to the size of the first one."
+                ),
+                io.Int.Input(
+                    "seed",
+                    default=0,
+                    min=0,
+                    max=0xffffffff,
+                    step=1,
+                    tooltip="Random seed for 'random' mode. Different seed = different images."
+                ),
+                io.Combo.Input(
+                    "selection_mode",
+                    options=["first", "random"],
+                    default="first",
+                    tooltip="'first' = newest/best matches, 'random' = random selection from up to 1000 matches using seed"
+                )
+            ],
+            outputs=[
+                io.Image.Output(
+                    display_name="images",
+                    tooltip="Batch of images loaded from the library"
+                )
+            ],
+        )
+    
+    @classmethod
+    def execute(
+        cls,
+        category: str,
+        search_query: str,
+        machine_name: str,
+        min_width: int,
+        min_height: int,
+        batch_size: int,
+        seed: int,
+        selection_mode: str
+    ) -> io.NodeOutput:
+        manager = get_library_manager()
+        
+        # Random mode samples from a wider pool than it returns
+        search_results = manager.search_images(
+            category=category if category else None,
+            search_query=search_query.strip() if search_query else None,
+            machine_name=machine_name if machine_name else None,
+            min_width=min_width if min_width > 0 else None,
+            min_height=min_height if min_height > 0 else None,
+            limit=1000 if selection_mode == "random" else batch_size
+        )
+        filepaths = manager.get_image_files(search_results)
+        
+        if not filepaths:
+            logger.warning("No images found matching the search criteria")
+            return io.NodeOutput(_PLACEHOLDER_IMAGE)
+        
+        if selection_mode == "random":
+            filepaths = random.Random(seed).sample(filepaths, min(batch_size, len(filepaths)))
+        
+        try:
+            images = load_image_batch(filepaths)
+            logger.info(f"Loaded {images.shape[0]} images from library, shape: {images.shape}")
+            return io.NodeOutput(images)
+        except Exception as e:
+            logger.error(f"Error loading image batch: {e}")
+            return io.NodeOutput(_PLACEHOLDER_IMAGE)
 
 
 class SearchImageLibrary(io.ComfyNode):
@@ -459,15 +959,7 @@ class SearchImageLibrary(io.ComfyNode):
     
     @classmethod
     def define_schema(cls):
-        # Get categories and machine names with error handling
-        try:
-            manager = get_library_manager()
-            categories = manager.get_categories()
-            machine_names = manager.get_machine_names()
-        except Exception as e:
-            logger.warning(f"Could not initialize library manager in define_schema: {e}. Using defaults.")
-            categories = DEFAULT_CATEGORIES
-            machine_names = [platform.node()] if platform.node() else []
+        categories, machine_names = _library_choices()
         
         return io.Schema(
             node_id="SearchImageLibrary",
@@ -533,7 +1025,7 @@ class SearchImageLibrary(io.ComfyNode):
         )
         
         # Convert to JSON string
-        results_json = json.dumps(search_results, indent=2)
+        results_json = _json_dumps(search_results, indent=True)
         logger.info(f"Found {len(search_results)} images matching search criteria")
         
         return io.NodeOutput(results_json)
@@ -576,6 +1068,7 @@ class WebScraperExtension(ComfyExtension):
     async def get_node_list(self) -> list[type[io.ComfyNode]]:
         nodes = [
             LoadImageFromLibrary,
+            LoadImagesFromLibrary,
             SearchImageLibrary,
         ]
         
@@ -638,38 +1131,118 @@ class WebScraperExtension(ComfyExtension):
 WEB_DIRECTORY = os.path.join(os.path.dirname(__file__), "web")
 
 
+# Content types for the image formats the scraper saves
+_IMAGE_CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    ".gif": "image/gif",
+}
+
+
+# Image files under the library directory are served by path from here, so
+# the frontend can fetch them without a database lookup per image. Only
+# files with an extension in _IMAGE_CONTENT_TYPES are served; the database,
+# metadata and download index next to them are not.
+LIBRARY_FILES_ROUTE = "/webscraper/library-files"
+
+
+def _library_image_url(image_id: int, filepath: str, library_path: Path) -> str:
+    """URL the frontend should load an image from"""
+    if os.path.splitext(filepath)[1].lower() in _IMAGE_CONTENT_TYPES:
+        try:
+            relative = Path(os.path.normpath(filepath)).relative_to(library_path)
+        except ValueError:
+            # Outside the library, on another drive, or a relative path
+            relative = None
+        if relative is not None and relative.parts:
+            return f"{LIBRARY_FILES_ROUTE}/{quote(relative.as_posix())}"
+    # Only the id-based route can serve it
+    return f"/webscraper/library/image/{image_id}"
+
+
+def _resolve_library_file(library_path: Path, relative: str) -> Optional[Path]:
+    """
+    The image file a library-files URL names, or None if it doesn't name one
+    
+    Symlinks and ".." are resolved before the containment and extension
+    checks, so nothing outside library_path and nothing but an image (e.g.
+    not a x.jpg symlink to library.db) can be reached.
+    """
+    if os.path.splitext(relative)[1].lower() not in _IMAGE_CONTENT_TYPES:
+        return None
+    root = library_path.resolve()
+    target = (root / relative).resolve()
+    if (target.suffix.lower() in _IMAGE_CONTENT_TYPES
+            and target.is_relative_to(root) and target.is_file()):
+        return target
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _guess_content_type(ext: str) -> str:
+    """Content type for extensions outside _IMAGE_CONTENT_TYPES"""
+    return mimetypes.guess_type(f"file{ext}")[0] or "application/octet-stream"
+
+
+# Read size when aiohttp can't use sendfile (e.g. TLS) and copies files
+# through userspace; sized for a local frontend over loopback
+FILE_RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Lets the browser reuse library images it has fetched without asking again
+# for an hour; after that, the ETag makes revalidation a bodiless 304
+IMAGE_CACHE_CONTROL = "public, max-age=3600"
+
+# Library summary for /webscraper/library/debug. Column names come from the
+# first SELECT; the count row carries its total in "id".
+_DEBUG_SUMMARY_SQL = '''
+    SELECT 'count' AS kind, COUNT(*) AS id, NULL AS filename, NULL AS filepath,
+           NULL AS category, NULL AS source
+    FROM images
+    UNION ALL
+    SELECT * FROM (SELECT 'sample', id, filename, filepath, category, source FROM images LIMIT 5)
+    UNION ALL
+    SELECT 'category', NULL, NULL, NULL, category, NULL FROM images
+    WHERE category IS NOT NULL GROUP BY category
+'''
+
+
+# Set once setup_api_routes has registered everything; it is called both at
+# import and from comfy_entrypoint
+_routes_registered = False
+
 # Add API routes for web scraper
 def setup_api_routes():
-    """Setup API routes for web scraper"""
+    """Setup API routes for web scraper (once; later calls do nothing)"""
+    global _routes_registered
+    if _routes_registered:
+        return
     try:
         from server import PromptServer
         from aiohttp import web
         import uuid
         
+        # JSON replies go through orjson when it is installed
+        json_response = functools.partial(web.json_response, dumps=_json_dumps)
+        
         @PromptServer.instance.routes.post("/webscraper/start")
         async def start_scraper(request):
             try:
                 data = await request.json()
                 session_id = str(uuid.uuid4())
                 
-                # Get API key from request
+                # Get API key(s) from request; source "all" sends one per source.
+                # start_scraping stores them in the environment for the session.
                 api_key = data.get("api_key", "")
-                if not api_key:
-                    return web.json_response({
+                api_keys = data.get("api_keys") or {}
+                if not api_key and not any(api_keys.values()):
+                    return json_response({
                         "success": False,
                         "error": "API key is required"
                     }, status=400)
                 
-                # Set API key as environment variable for this session
-                import os
-                source = data.get("source", "freepik")
-                if source == "freepik":
-                    os.environ["FREEPIK_API_KEY"] = api_key
-                elif source == "pixabay":
-                    os.environ["PIXABAY_API_KEY"] = api_key
-                elif source == "unsplash":
-                    os.environ["UNSPLASH_ACCESS_KEY"] = api_key
-                
                 if start_scraping:
                     # Start scraping in background
                     asyncio.create_task(start_scraping(
@@ -684,21 +1257,22 @@ def setup_api_routes():
                         tags=data.get("tags", []),
                         api_key=api_key,
                         exclude_ai=data.get("exclude_ai", True),
-                        photos_only=data.get("photos_only", True)
+                        photos_only=data.get("photos_only", True),
+                        api_keys=api_keys
                     ))
                     
-                    return web.json_response({
+                    return json_response({
                         "success": True,
                         "session_id": session_id
                     })
                 else:
-                    return web.json_response({
+                    return json_response({
                         "success": False,
                         "error": "Scraper not available"
                     }, status=500)
             except Exception as e:
                 logger.error(f"Error starting scraper: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e)
                 }, status=500)
@@ -709,15 +1283,15 @@ def setup_api_routes():
                 session_id = request.match_info["session_id"]
                 if cancel_scraping:
                     result = cancel_scraping(session_id)
-                    return web.json_response(result)
+                    return json_response(result)
                 else:
-                    return web.json_response({
+                    return json_response({
                         "success": False,
                         "error": "Scraper not available"
                     }, status=500)
             except Exception as e:
                 logger.error(f"Error cancelling scraper: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e)
                 }, status=500)
@@ -728,14 +1302,14 @@ def setup_api_routes():
                 session_id = request.match_info["session_id"]
                 if get_scraping_status:
                     status = get_scraping_status(session_id)
-                    return web.json_response(status)
+                    return json_response(status)
                 else:
-                    return web.json_response({
+                    return json_response({
                         "error": "Scraper not available"
                     }, status=500)
             except Exception as e:
                 logger.error(f"Error getting status: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "error": str(e)
                 }, status=500)
         
@@ -743,7 +1317,7 @@ def setup_api_routes():
         async def get_library_images(request):
             """Get images from the library with optional filters"""
             try:
-                manager = get_library_manager()
+                manager = await _get_library_manager_async()
                 
                 # Get query parameters
                 category = request.query.get("category", None)
@@ -757,55 +1331,37 @@ def setup_api_routes():
                 min_width = int(min_width) if min_width else None
                 min_height = int(min_height) if min_height else None
                 
-                # Check total images in database first
-                conn = sqlite3.connect(str(manager.db_path))
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM images")
-                total_count = cursor.fetchone()[0]
-                conn.close()
-                logger.info(f"Total images in database: {total_count}")
-                
-                # Search images
-                images = manager.search_images(
-                    category=category if category else None,
-                    search_query=search_query if search_query else None,
-                    machine_name=machine_name if machine_name else None,
-                    min_width=min_width if min_width and min_width > 0 else None,
-                    min_height=min_height if min_height and min_height > 0 else None,
-                    limit=limit
-                )
-                
-                logger.info(f"Library search: category={category}, search_query={search_query}, found {len(images)} images (total in DB: {total_count})")
+                def search():
+                    images = manager.search_images(
+                        category=category if category else None,
+                        search_query=search_query if search_query else None,
+                        machine_name=machine_name if machine_name else None,
+                        min_width=min_width if min_width and min_width > 0 else None,
+                        min_height=min_height if min_height and min_height > 0 else None,
+                        limit=limit
+                    )
+                    
+                    logger.info(f"Library search: category={category}, search_query={search_query}, found {len(images)} images (~{manager.approx_count()} in DB)")
+                    return manager.existing_images(images)
                 
-                # Convert file paths to URLs that can be accessed by the frontend
-                result = []
-                for img in images:
-                    filepath = img["filepath"]
-                    if os.path.exists(filepath):
-                        # Use the filepath directly - ComfyUI should be able to serve it
-                        # The frontend will construct the URL
-                        result.append({
-                            "id": img["id"],
-                            "filename": img["filename"],
-                            "filepath": filepath,
-                            "category": img["category"],
-                            "tags": img["tags"],
-                            "source": img["source"],
-                            "width": img["width"],
-                            "height": img["height"]
-                        })
-                    else:
-                        logger.warning(f"Image file not found: {filepath}")
+                # Search images; SQLite queries and a stat per row, so keep
+                # them off the event loop
+                result = await _run_library_db(search)
+                for img in result:
+                    # search_images rows already carry the response fields
+                    # (fresh dicts, so extend them in place); add the URL the
+                    # frontend loads the image from
+                    img["url"] = _library_image_url(img["id"], img["filepath"], manager.library_path)
                 
                 logger.info(f"Returning {len(result)} valid images to frontend")
-                return web.json_response({
+                return json_response({
                     "success": True,
                     "images": result,
                     "count": len(result)
                 })
             except Exception as e:
                 logger.error(f"Error getting library images: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e)
                 }, status=500)
@@ -814,15 +1370,15 @@ def setup_api_routes():
         async def get_categories(request):
             """Get available categories"""
             try:
-                manager = get_library_manager()
-                categories = manager.get_categories()
-                return web.json_response({
+                manager = await _get_library_manager_async()
+                categories = await _run_library_db(manager.get_categories)
+                return json_response({
                     "success": True,
                     "categories": categories
                 })
             except Exception as e:
                 logger.error(f"Error getting categories: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e)
                 }, status=500)
@@ -831,15 +1387,31 @@ def setup_api_routes():
         async def get_machine_names(request):
             """Get available machine names"""
             try:
-                manager = get_library_manager()
-                machine_names = manager.get_machine_names()
-                return web.json_response({
+                manager = await _get_library_manager_async()
+                machine_names = await _run_library_db(manager.get_machine_names)
+                return json_response({
                     "success": True,
                     "machine_names": machine_names
                 })
             except Exception as e:
                 logger.error(f"Error getting machine names: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
+                    "success": False,
+                    "error": str(e)
+                }, status=500)
+        
+        @PromptServer.instance.routes.get("/webscraper/library/health")
+        async def library_health(request):
+            """Cheap library check: is the database reachable and non-empty"""
+            try:
+                manager = await _get_library_manager_async()
+                return json_response({
+                    "success": True,
+                    "has_images": await _run_library_db(manager.has_images)
+                })
+            except Exception as e:
+                logger.error(f"Error in health endpoint: {e}", exc_info=True)
+                return json_response({
                     "success": False,
                     "error": str(e)
                 }, status=500)
@@ -848,47 +1420,51 @@ def setup_api_routes():
         async def debug_library(request):
             """Debug endpoint to check library status"""
             try:
-                manager = get_library_manager()
-                conn = sqlite3.connect(str(manager.db_path))
-                cursor = conn.cursor()
+                manager = await _get_library_manager_async()
                 
-                # Get total count
-                cursor.execute("SELECT COUNT(*) FROM images")
-                total_count = cursor.fetchone()[0]
-                
-                # Get sample images
-                cursor.execute("SELECT id, filename, filepath, category, source FROM images LIMIT 5")
-                sample_images = cursor.fetchall()
-                
-                # Get categories
-                cursor.execute("SELECT DISTINCT category FROM images WHERE category IS NOT NULL")
-                categories = [row[0] for row in cursor.fetchall()]
-                
-                conn.close()
+                def collect():
+                    cursor = manager.connection().cursor()
+                    cursor.row_factory = sqlite3.Row
+                    
+                    # Total count, sample images and categories in one
+                    # statement, told apart by the kind column
+                    cursor.execute(_DEBUG_SUMMARY_SQL)
+                    total_count = 0
+                    sample_images = []
+                    categories = []
+                    for row in cursor.fetchall():
+                        if row["kind"] == "count":
+                            total_count = row["id"]
+                        elif row["kind"] == "sample":
+                            sample_images.append(row)
+                        else:
+                            categories.append(row["category"])
+                    
+                    return {
+                        "success": True,
+                        "total_images": total_count,
+                        "db_path": str(manager.db_path),
+                        "db_exists": os.path.exists(manager.db_path),
+                        "library_dir": str(manager.library_path),
+                        "library_dir_exists": os.path.exists(manager.library_path),
+                        "sample_images": [
+                            {
+                                "id": img["id"],
+                                "filename": img["filename"],
+                                "filepath": img["filepath"],
+                                "file_exists": os.path.exists(img["filepath"]) if img["filepath"] else False,
+                                "category": img["category"],
+                                "source": img["source"]
+                            }
+                            for img in sample_images
+                        ],
+                        "categories": categories
+                    }
                 
-                return web.json_response({
-                    "success": True,
-                    "total_images": total_count,
-                    "db_path": str(manager.db_path),
-                    "db_exists": os.path.exists(manager.db_path),
-                    "library_dir": str(manager.library_path),
-                    "library_dir_exists": os.path.exists(manager.library_path),
-                    "sample_images": [
-                        {
-                            "id": img[0],
-                            "filename": img[1],
-                            "filepath": img[2],
-                            "file_exists": os.path.exists(img[2]) if img[2] else False,
-                            "category": img[3],
-                            "source": img[4]
-                        }
-                        for img in sample_images
-                    ],
-                    "categories": categories
-                })
+                return json_response(await _run_library_db(collect))
             except Exception as e:
                 logger.error(f"Error in debug endpoint: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e),
                     "traceback": traceback.format_exc()
@@ -901,74 +1477,95 @@ def setup_api_routes():
                 from PIL import Image as PILImage
                 import numpy as np
                 
-                manager = get_library_manager()
-                test_dir = manager.library_path / "test_images"
-                test_dir.mkdir(parents=True, exist_ok=True)
+                manager = await _get_library_manager_async()
+                test_image_path = manager.library_path / "test_images" / "test_image.png"
                 
-                # Create a simple test image
-                test_image_path = test_dir / "test_image.png"
-                img_array = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
-                test_img = PILImage.fromarray(img_array)
-                test_img.save(test_image_path)
+                def make_test_image():
+                    test_image_path.parent.mkdir(parents=True, exist_ok=True)
+                    
+                    # Create a simple test image
+                    img_array = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+                    test_img = PILImage.fromarray(img_array)
+                    test_img.save(test_image_path)
+                
+                # PNG encoding and file writes, so keep them off the event loop
+                await asyncio.to_thread(make_test_image)
                 
                 # Add to library
                 from library_manager import add_image_to_library
-                success = add_image_to_library(
+                success = await _run_library_db(
+                    add_image_to_library,
                     image_path=str(test_image_path),
                     category="test",
                     tags=["test", "debug"],
                     source="test"
                 )
                 
-                return web.json_response({
+                return json_response({
                     "success": success,
                     "message": "Test image created and added to library" if success else "Failed to add test image",
                     "image_path": str(test_image_path),
-                    "image_exists": os.path.exists(test_image_path)
+                    "image_exists": await asyncio.to_thread(os.path.exists, test_image_path)
                 })
             except Exception as e:
                 logger.error(f"Error in test-add endpoint: {e}", exc_info=True)
-                return web.json_response({
+                return json_response({
                     "success": False,
                     "error": str(e),
                     "traceback": traceback.format_exc()
                 }, status=500)
         
+        @PromptServer.instance.routes.get(LIBRARY_FILES_ROUTE + "/{path:.+}")
+        async def get_library_file(request):
+            """Serve an image file under the library directory by its path"""
+            try:
+                manager = await _get_library_manager_async()
+                # resolve() and is_file() touch the filesystem
+                filepath = await asyncio.to_thread(
+                    _resolve_library_file, manager.library_path, request.match_info["path"]
+                )
+                if filepath is None:
+                    return web.Response(status=404)
+                
+                # Same streaming and caching behaviour as the id-based route
+                return web.FileResponse(filepath, chunk_size=FILE_RESPONSE_CHUNK_SIZE, headers={
+                    "Content-Type": _IMAGE_CONTENT_TYPES[filepath.suffix.lower()],
+                    "Cache-Control": IMAGE_CACHE_CONTROL
+                })
+            except Exception as e:
+                logger.error(f"Error serving library file: {e}", exc_info=True)
+                return web.Response(status=500)
+        
         @PromptServer.instance.routes.get("/webscraper/library/image/{image_id}")
         async def get_image_file(request):
             """Serve image file by ID"""
             try:
                 image_id = int(request.match_info["image_id"])
-                manager = get_library_manager()
+                manager = await _get_library_manager_async()
                 
                 # Get image info from database
-                conn = sqlite3.connect(str(manager.db_path))
-                cursor = conn.cursor()
-                cursor.execute("SELECT filepath FROM images WHERE id = ?", (image_id,))
-                result = cursor.fetchone()
-                conn.close()
-                
-                if not result or not os.path.exists(result[0]):
+                filepath = await _run_library_db(manager.get_image_path, image_id)
+                if filepath is None:
                     return web.Response(status=404)
                 
-                filepath = result[0]
-                
                 # Determine content type
                 ext = os.path.splitext(filepath)[1].lower()
-                content_type = "image/png"
-                if ext in [".jpg", ".jpeg"]:
-                    content_type = "image/jpeg"
-                elif ext == ".webp":
-                    content_type = "image/webp"
+                content_type = _IMAGE_CONTENT_TYPES.get(ext) or _guess_content_type(ext)
                 
-                # Read and serve the file
-                with open(filepath, 'rb') as f:
-                    image_data = f.read()
-                    return web.Response(body=image_data, content_type=content_type)
+                # Stream the file; aiohttp uses sendfile(2) where the
+                # transport allows, so the image is never buffered here.
+                # FileResponse also sends Content-Length, ETag and
+                # Last-Modified, answers conditional requests with 304, and
+                # answers 404 itself if the file has gone missing.
+                return web.FileResponse(filepath, chunk_size=FILE_RESPONSE_CHUNK_SIZE, headers={
+                    "Content-Type": content_type,
+                    "Cache-Control": IMAGE_CACHE_CONTROL
+                })
             except Exception as e:
                 logger.error(f"Error serving image: {e}", exc_info=True)
                 return web.Response(status=500)
         
+        _routes_registered = True
         logger.info("Web scraper API routes registered")
     except Exception as e:
         logger.warning(f"Could not register web scraper API routes: {e}")